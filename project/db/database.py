@@ -1,105 +1,204 @@
 import sqlite3
+import mmap
 import os
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+FETCH_BATCH_SIZE = 256
+
+# Objects created by search_index.sql that older databases may lack
+SEARCH_INDEX_OBJECTS = {
+    "idx_problems_name_nocase",
+    "problems_fts",
+    "problems_fts_insert",
+    "problems_fts_delete",
+    "problems_fts_update",
+}
+
+INSERT_PROBLEM_SQL = """
+    INSERT INTO problems (name, description, domain_definition, example_queries)
+    VALUES (?, ?, ?, ?)
+"""
+
+SCHEMA_PATH = 'db/schema.sql'
+# Indexes, FTS table and triggers only, so it can be run against a database that already has data
+SEARCH_INDEX_PATH = 'db/search_index.sql'
+
+def read_schema(path: str = SCHEMA_PATH) -> str:
+    """Read the schema script by mapping the file instead of copying it through a buffered reader"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode('utf-8')
 
 class DatabaseManager:
     def __init__(self, db_path: str = "db/problems.db"):
         self.db_path = db_path
-        self._ensure_db_exists()
-    
-    def _ensure_db_exists(self):
-        """Ensure database exists and has correct schema"""
-        if not os.path.exists(self.db_path):
-            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        is_new = not os.path.exists(self.db_path)
+        if is_new:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        # One long-lived connection so SQLite's page cache and statement cache survive between calls
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._configure_connection()
+        
+        if is_new:
             self._init_db()
+        else:
+            self._upgrade_schema()
+    
+    def _configure_connection(self):
+        """Tune SQLite for a read-heavy workload (WAL journal, larger page cache)"""
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-64000;
+            PRAGMA mmap_size=268435456;
+        """)
     
     def _init_db(self):
         """Initialize database with schema"""
-        with open('db/schema.sql', 'r') as f:
-            schema = f.read()
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.executescript(schema)
-            conn.commit()
+        self._conn.executescript(read_schema())
+        self._create_search_index()
+    
+    def _upgrade_schema(self):
+        """Add indexes missing from databases created with an older schema"""
+        existing = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master")}
+        if not SEARCH_INDEX_OBJECTS <= existing:
+            # Only the index script is replayed; schema.sql would put back seed problems the user deleted
+            self._create_search_index()
     
-    def get_all_problems(self) -> List[Dict]:
+    def _create_search_index(self):
+        """Create the name index and the full-text index, then fill the latter from the existing rows"""
+        self._conn.executescript(read_schema(SEARCH_INDEX_PATH))
+        self._conn.commit()
+    
+    @staticmethod
+    def _fts_query(query: str) -> Optional[str]:
+        """Quote each search term so FTS5 treats it literally; None if the trigram index cannot serve it"""
+        terms = query.split()
+        # The trigram tokenizer cannot match terms shorter than three characters
+        if not terms or any(len(term) < 3 for term in terms):
+            return None
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+    
+    def close(self):
+        """Close the underlying database connection"""
+        self._conn.close()
+    
+    def iter_problems(self) -> Iterator[sqlite3.Row]:
+        """Yield all problems from database, fetching rows in batches"""
+        cursor = self._conn.execute("""
+            SELECT id, name, description, domain_definition, example_queries
+            FROM problems
+            ORDER BY name
+        """)
+        cursor.arraysize = FETCH_BATCH_SIZE
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+    
+    def get_all_problems(self) -> List[sqlite3.Row]:
         """Get all problems from database"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, name, description, domain_definition, example_queries
-                FROM problems
-                ORDER BY name
-            """)
-            return [dict(row) for row in cursor.fetchall()]
-    
-    def get_problem(self, problem_id: int) -> Optional[Dict]:
+        return list(self.iter_problems())
+    
+    def get_problem(self, problem_id: int) -> Optional[sqlite3.Row]:
         """Get a specific problem by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, name, description, domain_definition, example_queries
-                FROM problems
-                WHERE id = ?
-            """, (problem_id,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
-    
-    def get_problem_by_name(self, name: str) -> Optional[Dict]:
+        cursor = self._conn.execute("""
+            SELECT id, name, description, domain_definition, example_queries
+            FROM problems
+            WHERE id = ?
+        """, (problem_id,))
+        return cursor.fetchone()
+    
+    def get_problem_by_name(self, name: str) -> Optional[sqlite3.Row]:
         """Get a specific problem by name"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, name, description, domain_definition, example_queries
-                FROM problems
-                WHERE name = ?
-            """, (name,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
+        cursor = self._conn.execute("""
+            SELECT id, name, description, domain_definition, example_queries
+            FROM problems
+            WHERE name = ?
+        """, (name,))
+        return cursor.fetchone()
+    
+    def get_problems_by_names(self, names: Iterable[str]) -> Dict[str, sqlite3.Row]:
+        """Get several problems by name in one query; names without a problem are left out"""
+        names = list(names)
+        if not names:
+            return {}
+        placeholders = ", ".join("?" * len(names))
+        cursor = self._conn.execute(f"""
+            SELECT id, name, description, domain_definition, example_queries
+            FROM problems
+            WHERE name IN ({placeholders})
+        """, names)
+        return {row["name"]: row for row in cursor}
     
     def add_problem(self, name: str, description: str, domain_definition: str, example_queries: str) -> int:
         """Add a new problem to database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO problems (name, description, domain_definition, example_queries)
-                VALUES (?, ?, ?, ?)
-            """, (name, description, domain_definition, example_queries))
-            conn.commit()
-            return cursor.lastrowid
+        cursor = self._conn.execute(INSERT_PROBLEM_SQL, (name, description, domain_definition, example_queries))
+        self._conn.commit()
+        return cursor.lastrowid
+    
+    def add_problems(self, rows: Iterable[Tuple[str, str, str, str]], returning: bool = False) -> Optional[List[int]]:
+        """Add many (name, description, domain_definition, example_queries) rows in one transaction"""
+        with self._conn:
+            if returning:
+                # executemany cannot return rows, so reuse the cached statement per row instead
+                return [
+                    self._conn.execute(INSERT_PROBLEM_SQL + " RETURNING id", row).fetchone()[0]
+                    for row in rows
+                ]
+            self._conn.executemany(INSERT_PROBLEM_SQL, rows)
+        return None
     
     def update_problem(self, problem_id: int, name: str, description: str, domain_definition: str, example_queries: str) -> bool:
         """Update an existing problem"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE problems
-                SET name = ?, description = ?, domain_definition = ?, example_queries = ?
-                WHERE id = ?
-            """, (name, description, domain_definition, example_queries, problem_id))
-            conn.commit()
-            return cursor.rowcount > 0
+        cursor = self._conn.execute("""
+            UPDATE problems
+            SET name = ?, description = ?, domain_definition = ?, example_queries = ?
+            WHERE id = ?
+        """, (name, description, domain_definition, example_queries, problem_id))
+        self._conn.commit()
+        return cursor.rowcount > 0
     
     def delete_problem(self, problem_id: int) -> bool:
         """Delete a problem from database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM problems WHERE id = ?", (problem_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+        cursor = self._conn.execute("DELETE FROM problems WHERE id = ?", (problem_id,))
+        self._conn.commit()
+        return cursor.rowcount > 0
     
-    def search_problems(self, query: str) -> List[Dict]:
+    def search_problems_prefix(self, prefix: str) -> List[sqlite3.Row]:
+        """Find problems whose name starts with prefix (case-insensitive, served by the name index)"""
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        cursor = self._conn.execute("""
+            SELECT id, name, description, domain_definition, example_queries
+            FROM problems
+            WHERE name LIKE ? ESCAPE '\\'
+            ORDER BY name COLLATE NOCASE
+        """, (pattern,))
+        return cursor.fetchall()
+    
+    def search_problems(self, query: str) -> List[sqlite3.Row]:
         """Search problems by name or description"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, name, description, domain_definition, example_queries
-                FROM problems
-                WHERE name LIKE ? OR description LIKE ?
-                ORDER BY name
-            """, (f"%{query}%", f"%{query}%"))
-            return [dict(row) for row in cursor.fetchall()] 
\ No newline at end of file
+        fts_query = self._fts_query(query)
+        if fts_query is not None:
+            cursor = self._conn.execute("""
+                SELECT p.id, p.name, p.description, p.domain_definition, p.example_queries
+                FROM problems_fts f
+                JOIN problems p ON p.id = f.rowid
+                WHERE problems_fts MATCH ?
+                ORDER BY rank
+            """, (fts_query,))
+            return cursor.fetchall()
+        
+        cursor = self._conn.execute("""
+            SELECT id, name, description, domain_definition, example_queries
+            FROM problems
+            WHERE name LIKE ? OR description LIKE ?
+            ORDER BY name
+        """, (f"%{query}%", f"%{query}%"))
+        return cursor.fetchall()
@@ -8,7 +8,7 @@ CREATE TABLE IF NOT EXISTS problems (
 );
 
 -- Tank Crew Mission
-INSERT INTO problems (name, description, domain_definition, example_queries) VALUES (
+INSERT OR IGNORE INTO problems (name, description, domain_definition, example_queries) VALUES (
     'Tank Crew Mission',
     'A tank crew consisting of a commander, gunner, and driver executing a combat mission.',
     'causes move(driver) position_changed if engine_on
@@ -29,7 +29,7 @@ active gunner in fire by commander, gunner, driver'
 );
 
 -- Football Team
-INSERT INTO problems (name, description, domain_definition, example_queries) VALUES (
+INSERT OR IGNORE INTO problems (name, description, domain_definition, example_queries) VALUES (
     'Football Team',
     'A football team executing an offensive play.',
     'causes pass(quarterback) ball_in_air
@@ -46,7 +46,7 @@ active receiver in catch by quarterback, receiver, runner'
 );
 
 -- Rescue Team
-INSERT INTO problems (name, description, domain_definition, example_queries) VALUES (
+INSERT OR IGNORE INTO problems (name, description, domain_definition, example_queries) VALUES (
     'Rescue Team',
     'A rescue team responding to an emergency situation.',
     'causes assess(medic) situation_evaluated
@@ -63,7 +63,7 @@ active medic in treat by medic, firefighter'
 );
 
 -- Fire Brigade
-INSERT INTO problems (name, description, domain_definition, example_queries) VALUES (
+INSERT OR IGNORE INTO problems (name, description, domain_definition, example_queries) VALUES (
     'Fire Brigade',
     'A fire brigade responding to a building fire.',
     'causes inspect(chief) risk_assessed
@@ -80,7 +80,7 @@ active firefighter in spray by chief, operator, firefighter'
 );
 
 -- Medical Diagnosis
-INSERT INTO problems (name, description, domain_definition, example_queries) VALUES (
+INSERT OR IGNORE INTO problems (name, description, domain_definition, example_queries) VALUES (
     'Medical Diagnosis',
     'A team of doctors diagnosing and treating a patient.',
     'causes examine(physician) symptoms_identified
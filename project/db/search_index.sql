@@ -0,0 +1,27 @@
+-- Case-insensitive name index; lets prefix LIKE searches use a range scan
+CREATE INDEX IF NOT EXISTS idx_problems_name_nocase ON problems (name COLLATE NOCASE);
+
+-- Full-text search index over name/description, kept in sync by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS problems_fts USING fts5(
+    name,
+    description,
+    content='problems',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS problems_fts_insert AFTER INSERT ON problems BEGIN
+    INSERT INTO problems_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS problems_fts_delete AFTER DELETE ON problems BEGIN
+    INSERT INTO problems_fts (problems_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS problems_fts_update AFTER UPDATE ON problems BEGIN
+    INSERT INTO problems_fts (problems_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO problems_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+
+-- Index the rows that already exist; the triggers keep it current from here on
+INSERT INTO problems_fts (problems_fts) VALUES ('rebuild');
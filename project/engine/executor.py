@@ -1,124 +1,351 @@
-from typing import Set, Dict, List, Tuple, Optional
+from typing import AbstractSet, Set, FrozenSet, Dict, Iterator, List, Tuple, Optional
 from dataclasses import dataclass
-from copy import deepcopy
+import sys
+
+NOT_PREFIX = "not "
+NOT_LEN = len(NOT_PREFIX)
+
+def split_polarity(effect: str) -> Tuple[str, bool]:
+    """Split an effect such as "not engine_on" into (fluent, positive)"""
+    # Interned so equal fluents share one object and set lookups can match on identity
+    if effect.startswith(NOT_PREFIX):
+        return sys.intern(effect[NOT_LEN:]), False
+    return sys.intern(effect), True
 
 @dataclass
 class State:
     """Represents a state in the system"""
     fluents: Set[str]
     released: Set[str]
-
+    
     def copy(self) -> 'State':
         return State(
             fluents=self.fluents.copy(),
             released=self.released.copy()
         )
+    
+    def apply_delta(self, delta: 'StateDelta'):
+        """Apply the changes made by an action in place"""
+        self.fluents -= delta.removed
+        self.fluents |= delta.added
+        self.released |= delta.released
+
+@dataclass
+class StateDelta:
+    """Changes an action makes to a state; every other fluent is inertial"""
+    added: Set[str]
+    removed: Set[str]
+    released: Set[str]
+
+class FluentIndex:
+    """Assigns each fluent literal a bit so sets of fluents can be stored as int masks"""
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._names: List[str] = []
+    
+    def bit(self, fluent: str) -> int:
+        """Return the bit of a fluent, assigning a new one if it is unknown"""
+        bit = self._bits.get(fluent)
+        if bit is None:
+            bit = 1 << len(self._names)
+            self._bits[fluent] = bit
+            self._names.append(fluent)
+        return bit
+    
+    def mask(self, fluents) -> int:
+        """Encode a collection of fluents as a bitmask"""
+        mask = 0
+        for fluent in fluents:
+            mask |= self.bit(fluent)
+        return mask
+    
+    def condition(self, literals) -> Optional[Tuple[int, int]]:
+        """Encode literals such as "not engine_on" as (mask, value); a state satisfies them if state & mask == value"""
+        mask = 0
+        value = 0
+        negated = 0
+        for literal in literals:
+            fluent, positive = split_polarity(literal)
+            bit = self.bit(fluent)
+            if positive:
+                value |= bit
+            else:
+                negated |= bit
+            mask |= bit
+        if value & negated:
+            return None  # Contradictory literals can never hold together
+        return mask, value
+    
+    def fluents(self, mask: int) -> Set[str]:
+        """Decode a bitmask back into a set of fluents"""
+        names = self._names
+        result = set()
+        index = 0
+        while mask:
+            if mask & 1:
+                result.add(names[index])
+            mask >>= 1
+            index += 1
+        return result
+
+@dataclass
+class ActionBundle:
+    """All rules attached to one action, so a step needs a single table lookup"""
+    # Explicit slots rather than dataclass(slots=True), which needs Python 3.10
+    __slots__ = ("causes", "releases", "impossible")
+    causes: Tuple[Tuple[str, bool, FrozenSet[str]], ...]
+    releases: FrozenSet[str]
+    impossible: Tuple[FrozenSet[str], ...]
+
+@dataclass
+class CompiledAction:
+    """Bitmask form of all rules attached to one action"""
+    impossible: Tuple[Tuple[int, int], ...]  # (condition mask, required value)
+    releases: int
+    effects: Tuple[Tuple[int, int, int, bool], ...]  # (condition mask, required value, effect bit, positive)
+    
+    def is_possible(self, fluents: int) -> bool:
+        """Check the impossible rules against a fluent bitmask"""
+        for mask, value in self.impossible:
+            if fluents & mask == value:
+                return False
+        return True
+    
+    def effect_masks(self, fluents: int) -> Tuple[int, int]:
+        """Return the (added, removed) bitmasks of the causes rules whose conditions hold"""
+        added = 0
+        removed = 0
+        for mask, value, bit, positive in self.effects:
+            if fluents & mask == value:
+                if positive:
+                    removed &= ~bit
+                    added |= bit
+                else:
+                    added &= ~bit
+                    removed |= bit
+        return added, removed
 
 class ActionExecutor:
     def __init__(self):
-        self.causes_rules: Dict[str, List[Tuple[str, List[str]]]] = {}
+        # action -> [(fluent, positive, conditions)]
+        self.causes_rules: Dict[str, List[Tuple[str, bool, FrozenSet[str]]]] = {}
         self.releases_rules: Dict[str, List[str]] = {}
-        self.impossible_rules: Dict[str, List[List[str]]] = {}
+        self.impossible_rules: Dict[str, List[FrozenSet[str]]] = {}
         self.always_rules: List[str] = []
+        # Net effect of the always rules (later rules override earlier ones)
+        self._always_add: Set[str] = set()
+        self._always_discard: Set[str] = set()
+        self.fluent_index = FluentIndex()
+        self._action_table: Optional[Dict[str, ActionBundle]] = None
+        self._compiled: Optional[Dict[str, CompiledAction]] = None
+        self._always_masks: Tuple[int, int] = (0, 0)
         
+    def _invalidate(self):
+        """Drop the tables derived from the rules after a rule is added"""
+        self._action_table = None
+        self._compiled = None
+    
     def add_causes_rule(self, action: str, effect: str, conditions: Optional[List[str]] = None):
         """Add a causes rule to the system"""
+        self._invalidate()
         if action not in self.causes_rules:
             self.causes_rules[action] = []
-        self.causes_rules[action].append((effect, conditions or []))
+        fluent, positive = split_polarity(effect)
+        self.causes_rules[action].append((fluent, positive, frozenset(conditions or [])))
     
     def add_releases_rule(self, action: str, fluent: str):
         """Add a releases rule to the system"""
+        self._invalidate()
         if action not in self.releases_rules:
             self.releases_rules[action] = []
         self.releases_rules[action].append(fluent)
     
     def add_impossible_rule(self, action: str, conditions: List[str]):
         """Add an impossible rule to the system"""
+        self._invalidate()
         if action not in self.impossible_rules:
             self.impossible_rules[action] = []
-        self.impossible_rules[action].append(conditions)
+        self.impossible_rules[action].append(frozenset(conditions))
     
     def add_always_rule(self, effect: str):
         """Add an always rule to the system"""
+        self._invalidate()
         self.always_rules.append(effect)
+        fluent, positive = split_polarity(effect)
+        if positive:
+            self._always_discard.discard(fluent)
+            self._always_add.add(fluent)
+        else:
+            self._always_add.discard(fluent)
+            self._always_discard.add(fluent)
+    
+    def action_table(self) -> Dict[str, ActionBundle]:
+        """Group the rules by action (cached until a rule is added)"""
+        if self._action_table is not None:
+            return self._action_table
+        
+        table = {}
+        for action in {*self.causes_rules, *self.releases_rules, *self.impossible_rules}:
+            table[action] = ActionBundle(
+                causes=tuple(self.causes_rules.get(action, ())),
+                releases=frozenset(self.releases_rules.get(action, ())),
+                impossible=tuple(self.impossible_rules.get(action, ())),
+            )
+        
+        self._action_table = table
+        return table
     
     def is_action_possible(self, action: str, state: State) -> bool:
         """Check if an action is possible in the given state"""
-        if action not in self.impossible_rules:
-            return True
-            
-        for conditions in self.impossible_rules[action]:
-            if all(cond in state.fluents for cond in conditions):
-                return False
-        return True
+        compiled = self.compile().get(action)
+        return compiled is None or compiled.is_possible(self.fluent_index.mask(state.fluents))
     
-    def apply_inertia(self, old_state: State, new_state: State):
-        """Apply the law of inertia to unreleased fluents"""
-        for fluent in old_state.fluents:
-            if fluent not in new_state.released and fluent not in new_state.fluents:
-                new_state.fluents.add(fluent)
-    
-    def apply_always_rules(self, state: State):
-        """Apply always rules to the state"""
-        for effect in self.always_rules:
-            if effect.startswith("not "):
-                state.fluents.discard(effect[4:])
-            else:
-                state.fluents.add(effect)
+    def action_delta(self, action: str, state: State) -> Optional[StateDelta]:
+        """Compute the changes an action makes in the given state (None if impossible)"""
+        compiled = self.compile().get(action)
+        index = self.fluent_index
+        added = removed = released = 0
+        
+        if compiled is not None:
+            fluents = index.mask(state.fluents)
+            if not compiled.is_possible(fluents):
+                return None
+            released = compiled.releases
+            # Apply causes; fluents not mentioned here keep their value (inertia)
+            added, removed = compiled.effect_masks(fluents)
+        
+        # Always rules override the effects of the action
+        always_add, always_clear = self._always_masks
+        added = (added & ~always_clear) | always_add
+        removed = (removed & ~always_add) | always_clear
+        
+        return StateDelta(added=index.fluents(added), removed=index.fluents(removed), released=index.fluents(released))
     
     def execute_action(self, action: str, state: State) -> Optional[State]:
         """Execute an action in the given state"""
-        if not self.is_action_possible(action, state):
+        delta = self.action_delta(action, state)
+        if delta is None:
             return None
-            
+        
         new_state = state.copy()
+        new_state.apply_delta(delta)
+        return new_state
+    
+    def compile(self) -> Dict[str, CompiledAction]:
+        """Translate the rule tables into bitmasks (cached until a rule is added)"""
+        if self._compiled is not None:
+            return self._compiled
         
-        # Apply releases
-        if action in self.releases_rules:
-            for fluent in self.releases_rules[action]:
-                new_state.released.add(fluent)
+        index = self.fluent_index
+        compiled = {}
+        for action, bundle in self.action_table().items():
+            # Rules whose conditions contradict each other can never fire and are dropped
+            effects = []
+            for fluent, positive, conditions in bundle.causes:
+                condition = index.condition(conditions)
+                if condition is not None:
+                    effects.append((*condition, index.bit(fluent), positive))
+            impossible = (index.condition(conditions) for conditions in bundle.impossible)
+            compiled[action] = CompiledAction(
+                impossible=tuple(condition for condition in impossible if condition is not None),
+                releases=index.mask(bundle.releases),
+                effects=tuple(effects),
+            )
         
-        # Apply causes
-        if action in self.causes_rules:
-            for effect, conditions in self.causes_rules[action]:
-                if all(cond in state.fluents for cond in conditions):
-                    if effect.startswith("not "):
-                        new_state.fluents.discard(effect[4:])
-                    else:
-                        new_state.fluents.add(effect)
+        self._always_masks = (index.mask(self._always_add), index.mask(self._always_discard))
         
-        # Apply inertia and always rules
-        self.apply_inertia(state, new_state)
-        self.apply_always_rules(new_state)
+        self._compiled = compiled
+        return compiled
+    
+    def execute_action_mask(self, action: str, fluents: int, released: int) -> Optional[Tuple[int, int]]:
+        """Bitmask counterpart of execute_action; returns (fluents, released) or None"""
+        compiled = self.compile().get(action)
+        added = removed = 0
+        if compiled is not None:
+            if not compiled.is_possible(fluents):
+                return None
+            released |= compiled.releases
+            added, removed = compiled.effect_masks(fluents)
         
-        return new_state
+        always_add, always_clear = self._always_masks
+        return ((fluents & ~removed) | added | always_add) & ~always_clear, released
     
     def execute_program(self, program: List[str], initial_state: State) -> List[State]:
         """Execute a program from the initial state"""
-        states = [initial_state]
-        current_state = initial_state
+        return list(self.iter_program(program, initial_state))
+    
+    def iter_program(self, program: List[str], initial_state: State) -> Iterator[State]:
+        """Yield the states visited by a program; nothing if the program is not executable"""
+        self.compile()
+        index = self.fluent_index
+        fluents = index.mask(initial_state.fluents)
+        released = index.mask(initial_state.released)
         
+        masks = []
         for action in program:
-            new_state = self.execute_action(action, current_state)
-            if new_state is None:
-                return []  # Program is not executable
-            states.append(new_state)
-            current_state = new_state
+            result = self.execute_action_mask(action, fluents, released)
+            if result is None:
+                return  # Program is not executable
+            fluents, released = result
+            masks.append(result)
         
-        return states
+        # Only the bitmasks are buffered; State objects are built as the caller consumes them
+        yield initial_state
+        for fluents, released in masks:
+            yield State(fluents=index.fluents(fluents), released=index.fluents(released))
+    
+    def final_state_mask(self, program: List[str], initial_state: State) -> Optional[Tuple[int, int]]:
+        """Run a program on bitmasks only; returns the final (fluents, released) masks or None if not executable"""
+        self.compile()
+        index = self.fluent_index
+        masks = (index.mask(initial_state.fluents), index.mask(initial_state.released))
+        for action in program:
+            masks = self.execute_action_mask(action, *masks)
+            if masks is None:
+                return None
+        return masks
+    
+    def execute_program_batch(self, program: List[str], initial_states: List[State]) -> List[Optional[State]]:
+        """Execute a program from many initial states; None marks states where it is not executable"""
+        compiled = self.compile()
+        index = self.fluent_index
+        always_add, always_clear = self._always_masks
+        # One (fluents, released) mask pair per initial state; None once the program failed there
+        batch = [(index.mask(state.fluents), index.mask(state.released)) for state in initial_states]
+        
+        # Walk the program once, applying each action to the whole batch so its rules are looked up once
+        for action in program:
+            rules = compiled.get(action)
+            for k, masks in enumerate(batch):
+                if masks is None:
+                    continue
+                fluents, released = masks
+                added = removed = 0
+                if rules is not None:
+                    if not rules.is_possible(fluents):
+                        batch[k] = None
+                        continue
+                    released |= rules.releases
+                    added, removed = rules.effect_masks(fluents)
+                batch[k] = (((fluents & ~removed) | added | always_add) & ~always_clear, released)
+        
+        return [
+            None if masks is None else State(fluents=index.fluents(masks[0]), released=index.fluents(masks[1]))
+            for masks in batch
+        ]
     
     def check_executable(self, program: List[str], initial_state: State) -> bool:
         """Check if a program is always executable from the initial state"""
-        return bool(self.execute_program(program, initial_state))
+        return self.final_state_mask(program, initial_state) is not None
     
-    def check_accessible(self, goal_state: Set[str], program: List[str], initial_state: State) -> bool:
+    def check_accessible(self, goal_state: AbstractSet[str], program: List[str], initial_state: State) -> bool:
         """Check if a goal state is sometimes accessible through a program"""
-        final_states = self.execute_program(program, initial_state)
-        if not final_states:
+        final = self.final_state_mask(program, initial_state)
+        if final is None:
             return False
-            
-        return all(fluent in final_states[-1].fluents for fluent in goal_state)
+        
+        goal = self.fluent_index.mask(goal_state)
+        return final[0] & goal == goal
     
     def check_realisable(self, program: List[str], group: List[str], initial_state: State) -> bool:
         """Check if a program is realisable by a group of agents"""
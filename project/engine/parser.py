@@ -10,75 +10,262 @@ from pyparsing import (
     Forward,
     ZeroOrMore,
     ParseException,
+    ParserElement,
     White,
     restOfLine,
 )
+from functools import lru_cache
+import re
+import sys
+
+STATEMENT_CACHE_SIZE = 256
+
+# Integer statement tags so consumers can dispatch by indexing instead of comparing type strings
+KIND_CAUSES = 0
+KIND_RELEASES = 1
+KIND_IMPOSSIBLE = 2
+KIND_ALWAYS = 3
+KIND_INITIALLY = 4
+STATEMENT_KINDS = {
+    "causes": KIND_CAUSES,
+    "releases": KIND_RELEASES,
+    "impossible": KIND_IMPOSSIBLE,
+    "always": KIND_ALWAYS,
+    "initially": KIND_INITIALLY,
+}
+
+# Memoize sub-expression matches so the statement alternatives are not re-parsed
+ParserElement.enablePackrat(cache_size_limit=256)
+
+# Identifiers follow the grammar's Word(alphas, alphanums + "_"); punctuation is ( ) and ,
+TOKEN_RE = re.compile(r"\s*(?:([A-Za-z][A-Za-z0-9_]*)|([(),]))")
+
+class _FastParseError(Exception):
+    """Raised when the hand-written parser cannot handle the input"""
+
+def _tokenize(text: str) -> list:
+    """Split a statement into identifier and punctuation tokens"""
+    tokens = []
+    pos = 0
+    end = len(text.rstrip())
+    while pos < end:
+        match = TOKEN_RE.match(text, pos)
+        if match is None:
+            raise _FastParseError(pos)
+        tokens.append(match.group(1) or match.group(2))
+        pos = match.end()
+    return tokens
+
+def _is_identifier(tokens: list, i: int) -> bool:
+    return i < len(tokens) and tokens[i][0].isalpha()
+
+def _parse_identifier(tokens: list, i: int):
+    if not _is_identifier(tokens, i):
+        raise _FastParseError(i)
+    return tokens[i], i + 1
+
+def _parse_action(tokens: list, i: int):
+    """action [( agent {, agent} )] -> ('name', '(', 'agent', ..., ')')"""
+    name, i = _parse_identifier(tokens, i)
+    if i >= len(tokens) or tokens[i] != "(":
+        return (name,), i
+    parts = [name, "("]
+    agent, i = _parse_identifier(tokens, i + 1)
+    parts.append(agent)
+    while i < len(tokens) and tokens[i] == ",":
+        agent, i = _parse_identifier(tokens, i + 1)
+        parts.append(agent)
+    if i >= len(tokens) or tokens[i] != ")":
+        raise _FastParseError(i)
+    parts.append(")")
+    return tuple(parts), i + 1
+
+def _parse_effect(tokens: list, i: int):
+    """[not] fluent -> ('not', 'fluent') or ('fluent',)"""
+    if i < len(tokens) and tokens[i] == "not":
+        fluent, i = _parse_identifier(tokens, i + 1)
+        return ("not", fluent), i
+    fluent, i = _parse_identifier(tokens, i)
+    return (fluent,), i
+
+def _parse_effect_list(tokens: list, i: int):
+    """effect {, effect}"""
+    effect, i = _parse_effect(tokens, i)
+    effects = [effect]
+    while i < len(tokens) and tokens[i] == ",":
+        effect, i = _parse_effect(tokens, i + 1)
+        effects.append(effect)
+    return tuple(effects), i
+
+def _parse_conditions(tokens: list, i: int):
+    """[if effect {, effect}]"""
+    if i < len(tokens) and tokens[i] == "if":
+        return _parse_effect_list(tokens, i + 1)
+    return (), i
+
+def _parse_tokens(tokens: list) -> dict:
+    """Parse a tokenized statement into the same dictionary the grammar produces"""
+    if not tokens:
+        raise _FastParseError(0)
+    keyword = tokens[0]
+    
+    if keyword == "initially":
+        effects, i = _parse_effect_list(tokens, 1)
+        stmt_dict = {
+            "type": "initially",
+            "fluents": tuple(("not", e[1]) if len(e) == 2 else ("pos", e[0]) for e in effects),
+        }
+    elif keyword == "causes":
+        action, i = _parse_action(tokens, 1)
+        effect, i = _parse_effect(tokens, i)
+        conditions, i = _parse_conditions(tokens, i)
+        stmt_dict = {"type": "causes", "action": action, "effect": effect, "conditions": conditions}
+    elif keyword == "impossible":
+        action, i = _parse_action(tokens, 1)
+        conditions, i = _parse_conditions(tokens, i)
+        stmt_dict = {"type": "impossible", "action": action, "conditions": conditions}
+    elif keyword == "always":
+        effect, i = _parse_effect(tokens, 1)
+        stmt_dict = {"type": "always", "effect": effect}
+    elif keyword == "releases":
+        action, i = _parse_action(tokens, 1)
+        fluent, i = _parse_identifier(tokens, i)
+        stmt_dict = {"type": "releases", "action": action, "fluent": (fluent,)}
+    else:
+        raise _FastParseError(0)
+    
+    if i != len(tokens):
+        raise _FastParseError(i)
+    return _annotate(stmt_dict)
+
+def _join_literal(parts) -> str:
+    """Join a parsed literal such as ('not', 'engine_on') into 'not engine_on'"""
+    return sys.intern(" ".join(parts))
+
+def _annotate(stmt_dict: dict) -> dict:
+    """Attach the kind tag and the effect and conditions as ready-made strings"""
+    stmt_dict["kind"] = STATEMENT_KINDS[stmt_dict["type"]]
+    if "effect" in stmt_dict:
+        stmt_dict["effect_str"] = _join_literal(stmt_dict["effect"])
+    if "conditions" in stmt_dict:
+        stmt_dict["condition_strs"] = tuple(_join_literal(cond) for cond in stmt_dict["conditions"])
+    return stmt_dict
+
+def _freeze(value):
+    """Convert (nested) parse results into tuples so cached values cannot be mutated"""
+    if isinstance(value, str):
+        return value
+    return tuple(_freeze(item) for item in value)
 
 class ActionParser:
+    # Grammar elements are stateless, so they live on the class (see _build_grammar)
+    statement = None
+    
     def __init__(self):
+        # Parsed statements keyed by source text; the GUI re-submits the same lines often
+        self._parse_statement_cached = lru_cache(maxsize=STATEMENT_CACHE_SIZE)(self._parse_statement)
+        
+        self._build_grammar()
+    
+    @classmethod
+    def _build_grammar(cls):
+        """Build the pyparsing grammar once and share it between all parsers"""
+        if cls.statement is not None:
+            return
+        
         # Basic elements
-        self.identifier = Word(alphas, alphanums + "_")
-        self.agent = self.identifier.copy()
-        self.fluent = self.identifier.copy()
-        self.action = self.identifier.copy()
+        cls.identifier = Word(alphas, alphanums + "_")
+        cls.agent = cls.identifier.copy()
+        cls.fluent = cls.identifier.copy()
+        cls.action = cls.identifier.copy()
         
         # Action with optional agents
-        self.action_with_agents = Group(
-            self.action +
+        cls.action_with_agents = Group(
+            cls.action +
             Optional(
                 Literal("(") +
-                delimitedList(self.agent) +
+                delimitedList(cls.agent) +
                 Literal(")")
             )
         )
         
         # Effect
-        self.effect = Group(
+        cls.effect = Group(
             Optional(Literal("not")) +
-            self.fluent
+            cls.fluent
         )
         
         # Conditions
-        self.conditions = Group(
+        cls.conditions = Group(
             Literal("if") +
-            delimitedList(self.effect, delim=",")
+            delimitedList(cls.effect, delim=",")
         )
         
         # Initial state declaration
-        self.initially_stmt = Group(
+        cls.initially_stmt = Group(
             Literal("initially") +
-            delimitedList(self.effect, delim=",")
+            delimitedList(cls.effect, delim=",")
         )
         
         # Statement types
-        self.causes_stmt = Group(
+        cls.causes_stmt = Group(
             Literal("causes") +
-            self.action_with_agents +
-            self.effect +
-            Optional(self.conditions)
+            cls.action_with_agents +
+            cls.effect +
+            Optional(cls.conditions)
         )
         
-        self.impossible_stmt = Group(
+        cls.impossible_stmt = Group(
             Literal("impossible") +
-            self.action_with_agents +
-            Optional(self.conditions)
+            cls.action_with_agents +
+            Optional(cls.conditions)
         )
         
-        self.always_stmt = Group(
+        cls.always_stmt = Group(
             Literal("always") +
-            self.effect
+            cls.effect
+        )
+        
+        cls.releases_stmt = Group(
+            Literal("releases") +
+            cls.action_with_agents +
+            Group(cls.fluent)
         )
         
         # Complete statement
-        self.statement = (
-            self.causes_stmt |
-            self.impossible_stmt |
-            self.always_stmt |
-            self.initially_stmt
+        cls.statement = (
+            cls.causes_stmt |
+            cls.impossible_stmt |
+            cls.always_stmt |
+            cls.releases_stmt |
+            cls.initially_stmt
         )
     
     def parse_statement(self, text: str) -> dict:
         """Parse a statement and return a dictionary with its components"""
+        return dict(self._parse_statement_cached(text))
+    
+    def parse_statements(self, text: str) -> list:
+        """Parse every non-blank line of a domain definition into a list of statement dictionaries"""
+        cached = self._parse_statement_cached
+        return [dict(cached(line)) for line in map(str.strip, text.splitlines()) if line]
+    
+    def statement_cache_info(self):
+        """Return hit/miss statistics of the parsed statement cache"""
+        return self._parse_statement_cached.cache_info()
+    
+    def _parse_statement(self, text: str) -> dict:
+        """Parse a statement without consulting the cache"""
+        try:
+            return _parse_tokens(_tokenize(text))
+        except _FastParseError:
+            pass
+        # Let the pyparsing grammar handle unusual input and produce the error message; it runs outside
+        # the except block so the fast path's internal exception is not chained onto the user's error
+        return self._parse_with_grammar(text)
+    
+    def _parse_with_grammar(self, text: str) -> dict:
+        """Parse a statement with the pyparsing grammar"""
         try:
             result = self.statement.parseString(text, parseAll=True)[0]
             
@@ -87,37 +274,43 @@ class ActionParser:
             
             if result[0] == "initially":
                 stmt_dict["type"] = "initially"
-                stmt_dict["fluents"] = []
+                fluents = []
                 for fluent in result[1:]:
                     if len(fluent) == 2 and fluent[0] == "not":
-                        stmt_dict["fluents"].append(("not", fluent[1]))
+                        fluents.append(("not", fluent[1]))
                     else:
-                        stmt_dict["fluents"].append(("pos", fluent[0]))
-                return stmt_dict
+                        fluents.append(("pos", fluent[0]))
+                stmt_dict["fluents"] = tuple(fluents)
+                return _annotate(stmt_dict)
             
             elif result[0] == "causes":
                 stmt_dict["type"] = "causes"
-                stmt_dict["action"] = result[1]
-                stmt_dict["effect"] = result[2]
+                stmt_dict["action"] = _freeze(result[1])
+                stmt_dict["effect"] = _freeze(result[2])
                 if len(result) > 3 and result[3][0] == "if":
-                    stmt_dict["conditions"] = result[3][1:]
+                    stmt_dict["conditions"] = _freeze(result[3][1:])
                 else:
-                    stmt_dict["conditions"] = []
-                    
+                    stmt_dict["conditions"] = ()
+            
             elif result[0] == "impossible":
                 stmt_dict["type"] = "impossible"
-                stmt_dict["action"] = result[1]
+                stmt_dict["action"] = _freeze(result[1])
                 if len(result) > 2 and result[2][0] == "if":
-                    stmt_dict["conditions"] = result[2][1:]
+                    stmt_dict["conditions"] = _freeze(result[2][1:])
                 else:
-                    stmt_dict["conditions"] = []
-                    
+                    stmt_dict["conditions"] = ()
+            
             elif result[0] == "always":
                 stmt_dict["type"] = "always"
-                stmt_dict["effect"] = result[1]
-                
-            return stmt_dict
+                stmt_dict["effect"] = _freeze(result[1])
             
+            elif result[0] == "releases":
+                stmt_dict["type"] = "releases"
+                stmt_dict["action"] = _freeze(result[1])
+                stmt_dict["fluent"] = _freeze(result[2])
+            
+            return _annotate(stmt_dict)
+        
         except ParseException as e:
             raise ValueError(f"Invalid statement syntax: {str(e)}")
     
@@ -1,128 +1,270 @@
-from typing import Set, List, Dict, Optional, Tuple
+from typing import Set, List, Dict, Iterator, Optional, Tuple
+import hashlib
+import logging
+import re
+import sys
+from functools import lru_cache
 from .parser import ActionParser
-from .executor import ActionExecutor, State
+from .executor import ActionExecutor, State, NOT_PREFIX, split_polarity
+
+logger = logging.getLogger(__name__)
+
+DOMAIN_CACHE_SIZE = 64
+QUERY_CACHE_SIZE = 256
+
+# The parser only holds its grammar and a thread-safe statement cache, so every instance can share one
+_SHARED_PARSER = ActionParser()
+
+def effect_name(name: str, negated: bool) -> str:
+    """Format a fluent literal; ("engine_on", True) gives 'not engine_on'"""
+    return sys.intern(NOT_PREFIX + name) if negated else sys.intern(name)
+
+@lru_cache(maxsize=1024)
+def action_name(action: tuple) -> str:
+    """Format parsed action tokens, e.g. ('move', '(', 'driver', ')') -> 'move(driver)'"""
+    if len(action) > 1:  # Has agents
+        return sys.intern(f"{action[0]}({','.join(action[2:-1])})")  # Skip parentheses
+    return sys.intern(action[0])
+
+def _expr_name(expr) -> str:
+    return expr.name if hasattr(expr, 'name') else str(expr)
+
+def _sequence_actions(program_expr) -> List[str]:
+    """Action names of a sequence of action expressions"""
+    return [action if type(action) is str else _expr_name(action) for action in program_expr]
+
+def _program_actions(program_expr) -> List[str]:
+    """Fallback for expression types without a registered handler"""
+    if isinstance(program_expr, str):
+        return [program_expr]
+    if hasattr(program_expr, 'name'):
+        return [program_expr.name]
+    return _sequence_actions(program_expr)
+
+# Explanations indexed by the query result (False -> 0, True -> 1)
+EXECUTABLE_EXPLANATIONS = ("Program is not always executable", "Program is always executable")
+ACCESSIBLE_EXPLANATIONS = ("Goal is not accessible", "Goal is sometimes accessible")
+REALISABLE_EXPLANATIONS = ("Program is not realisable by the group", "Program is realisable by the group")
+ACTIVE_EXPLANATIONS = ("Agent is not active in the action", "Agent is active in the action")
+
+# Query bodies, i.e. the text after the query keyword
+ACCESSIBLE_QUERY_RE = re.compile(r"^(?P<goal>.+?)(?:\s+from\s+(?P<conditions>.+?))?\s+in\s+(?P<program>.+)$")
+REALISABLE_QUERY_RE = re.compile(r"^(?P<program>.+)\s+by\s+(?P<group>.+)$")
+ACTIVE_QUERY_RE = re.compile(r"^(?P<agent>\S+)\s+in\s+(?P<action>\S+)\s+by\s+(?P<group>.+)$")
+
+def _split_program(text: str) -> List[str]:
+    """Split "move(driver); fire(gunner)" into action names matching the domain rules"""
+    return [sys.intern("".join(action.split())) for action in text.split(";") if action.strip()]
+
+def _split_names(text: str) -> List[str]:
+    """Split a comma separated list of agents or fluents"""
+    return [name.strip() for name in text.split(",") if name.strip()]
+
+def _match_query(pattern, body: str, kind: str):
+    match = pattern.match(body)
+    if match is None:
+        raise ValueError(f"Malformed {kind} query: {body}")
+    return match
+
+def _parse_executable(body: str) -> tuple:
+    return (tuple(_split_program(body)),)
+
+def _parse_accessible(body: str) -> tuple:
+    match = _match_query(ACCESSIBLE_QUERY_RE, body, "accessible")
+    conditions = tuple(split_polarity(condition) for condition in _split_names(match["conditions"] or ""))
+    return frozenset(_split_names(match["goal"])), conditions, tuple(_split_program(match["program"]))
+
+def _parse_realisable(body: str) -> tuple:
+    match = _match_query(REALISABLE_QUERY_RE, body, "realisable")
+    return tuple(_split_program(match["program"])), tuple(_split_names(match["group"]))
+
+def _parse_active(body: str) -> tuple:
+    match = _match_query(ACTIVE_QUERY_RE, body, "active")
+    return match["agent"], match["action"], tuple(_split_names(match["group"]))
+
+# Query keyword -> parser turning the query body into the arguments of its handler
+QUERY_PARSERS = {
+    "executable": _parse_executable,
+    "accessible": _parse_accessible,
+    "realisable": _parse_realisable,
+    "active": _parse_active,
+}
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(query_text: str) -> Tuple[str, tuple]:
+    """Parse a query once into (keyword, arguments), e.g. 'executable a; b' -> ('executable', (('a', 'b'),))"""
+    # "always" / "sometimes" only qualify the query keyword that follows
+    words = query_text.split(None, 1)
+    if words and words[0] in ("always", "sometimes"):
+        words = words[1].split(None, 1) if len(words) > 1 else []
+    parse = QUERY_PARSERS.get(words[0]) if words else None
+    if parse is None:
+        raise ValueError(f"Unknown query type: {query_text}")
+    return words[0], parse(words[1] if len(words) > 1 else "")
+
+# Program expression type -> converter to a list of action names
+PROGRAM_HANDLERS = {
+    str: lambda program_expr: [program_expr],
+    list: _sequence_actions,
+    tuple: _sequence_actions,
+}
 
 class ActionSemantics:
+    # Parsed domain rules keyed by a hash of the definition text, shared by all instances
+    _domain_cache: Dict[str, List[Tuple]] = {}
+    
     def __init__(self):
-        self.parser = ActionParser()
+        self.parser = _SHARED_PARSER
         self.executor = ActionExecutor()
         self.initial_state = State(fluents=set(), released=set())
+        self._query_dispatch = {
+            "executable": self._exec_executable,
+            "accessible": self._exec_accessible,
+            "realisable": self._exec_realisable,
+            "active": self._exec_active,
+        }
         
     def process_domain_definition(self, text: str):
         """Process a domain definition text"""
-        try:
-            # Reset initial state
-            self.initial_state = State(fluents=set(), released=set())
-            
-            # Split text into lines and process each line separately
-            lines = text.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Parse each line as a statement
-                stmt = self.parser.parse_statement(line)
-                
-                # Process based on statement type
-                if stmt["type"] == "initially":
-                    # Process initial state declarations
-                    for fluent_type, fluent in stmt["fluents"]:
-                        if fluent_type == "pos":
-                            self.initial_state.fluents.add(fluent)
-                        else:  # fluent_type == "not"
-                            self.initial_state.fluents.discard(fluent)
-                            
-                elif stmt["type"] == "causes":
-                    action = stmt["action"][0]  # Get action name
-                    if len(stmt["action"]) > 1:  # Has agents
-                        action = f"{action}({','.join(stmt['action'][2:-1])})"  # Skip parentheses
-                    effect = ' '.join(stmt["effect"])  # Join effect parts
-                    conditions = [' '.join(cond) for cond in stmt["conditions"]]  # Join condition parts
-                    self.executor.add_causes_rule(action, effect, conditions)
-                    
-                elif stmt["type"] == "impossible":
-                    action = stmt["action"][0]  # Get action name
-                    if len(stmt["action"]) > 1:  # Has agents
-                        action = f"{action}({','.join(stmt['action'][2:-1])})"  # Skip parentheses
-                    conditions = [' '.join(cond) for cond in stmt["conditions"]]  # Join condition parts
-                    self.executor.add_impossible_rule(action, conditions)
-                    
-                elif stmt["type"] == "always":
-                    effect = ' '.join(stmt["effect"])  # Join effect parts
-                    self.executor.add_always_rule(effect)
-                    
-                elif 'releases' in stmt:
-                    action = stmt.action.name if hasattr(stmt.action, 'name') else stmt.action
-                    fluent = stmt.fluent
-                    self.executor.add_releases_rule(action, fluent)
-                    
-        except Exception as e:
-            print(f"Error processing domain definition: {str(e)}")
-            raise ValueError(f"Error in domain definition: {str(e)}")
+        self.process_domain_definition_bytes(text.encode('utf-8'))
+    
+    def process_domain_definition_bytes(self, data: bytes):
+        """Process a UTF-8 encoded domain definition; it is only decoded when it is not cached yet"""
+        # Reset initial state and rules; cached rules are replayed into a fresh executor
+        self.initial_state = State(fluents=set(), released=set())
+        self.executor = executor = ActionExecutor()
+        
+        key = hashlib.blake2b(data, digest_size=16).hexdigest()
+        rules = self._domain_cache.get(key)
+        if rules is None:
+            try:
+                rules = self._parse_domain_rules(data.decode('utf-8'))
+            except ValueError as e:
+                logger.debug("Error processing domain definition: %s", e)
+                raise ValueError(f"Error in domain definition: {str(e)}") from e
+            if len(self._domain_cache) >= DOMAIN_CACHE_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._domain_cache[next(iter(self._domain_cache))]
+            self._domain_cache[key] = rules
+        
+        dispatch = {
+            "initially": self._apply_initially,
+            "causes": executor.add_causes_rule,
+            "impossible": executor.add_impossible_rule,
+            "always": executor.add_always_rule,
+            "releases": executor.add_releases_rule,
+        }
+        for rule_type, *args in rules:
+            dispatch[rule_type](*args)
+        # Build the bitmask tables now so the first query does not pay for it
+        executor.compile()
+    
+    def _parse_domain_rules(self, text: str) -> List[Tuple]:
+        """Parse a domain definition into (rule_type, *args) tuples"""
+        builders = self._RULE_BUILDERS
+        return [builders[stmt["kind"]](self, stmt) for stmt in self.parser.parse_statements(text)]
+    
+    def _initially_rule(self, stmt: dict) -> Tuple:
+        return ("initially", tuple((fluent_type, sys.intern(fluent)) for fluent_type, fluent in stmt["fluents"]))
+    
+    def _causes_rule(self, stmt: dict) -> Tuple:
+        action = action_name(stmt["action"])
+        return ("causes", action, stmt["effect_str"], stmt["condition_strs"])
+    
+    def _impossible_rule(self, stmt: dict) -> Tuple:
+        action = action_name(stmt["action"])
+        return ("impossible", action, stmt["condition_strs"])
+    
+    def _always_rule(self, stmt: dict) -> Tuple:
+        return ("always", stmt["effect_str"])
+    
+    def _releases_rule(self, stmt: dict) -> Tuple:
+        action = action_name(stmt["action"])
+        fluent = sys.intern(' '.join(stmt["fluent"]))
+        return ("releases", action, fluent)
+    
+    # Rule builders indexed by the parser's statement kind tag
+    _RULE_BUILDERS = (_causes_rule, _releases_rule, _impossible_rule, _always_rule, _initially_rule)
+    
+    def _apply_initially(self, fluents):
+        """Apply an initial state declaration"""
+        for fluent_type, fluent in fluents:
+            if fluent_type == "pos":
+                self.initial_state.fluents.add(fluent)
+            else:  # fluent_type == "not"
+                self.initial_state.fluents.discard(fluent)
     
     def _get_action_name(self, action_expr) -> str:
         """Extract action name from action expression"""
         if isinstance(action_expr, str):
             return action_expr
-        return action_expr.name if hasattr(action_expr, 'name') else str(action_expr)
+        return sys.intern(action_expr.name if hasattr(action_expr, 'name') else str(action_expr))
     
     def _get_effect_name(self, effect_expr) -> str:
         """Extract effect name from effect expression"""
         if isinstance(effect_expr, str):
             return effect_expr
-        if hasattr(effect_expr, 'negated'):
-            return f"not {effect_expr.name}"
-        return effect_expr.name if hasattr(effect_expr, 'name') else str(effect_expr)
+        negated = hasattr(effect_expr, 'negated')
+        if negated or hasattr(effect_expr, 'name'):
+            return effect_name(effect_expr.name, negated)
+        return sys.intern(str(effect_expr))
     
     def process_query(self, query_text: str, initial_state: Optional[State] = None) -> Tuple[bool, str]:
         """Process a query and return result with explanation"""
         try:
-            print(f"Processing query: {query_text}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing query: %s", query_text)
             query = self.parser.parse_query(query_text)
             
             # Use provided initial state or the one from domain definition
             state = initial_state if initial_state is not None else self.initial_state
             
-            # For now, return a dummy result
-            return True, "Query processed successfully"
+            # Repeated queries skip the string parsing and go straight to evaluation
+            kind, args = compile_query(query)
+            return self._query_dispatch[kind](state, *args)
             
         except ValueError as e:
-            print(f"Error processing query: {str(e)}")
-            raise ValueError(f"Error processing query: {str(e)}")
-        except Exception as e:
-            print(f"Unexpected error: {str(e)}")
-            raise ValueError(f"Unexpected error: {str(e)}")
+            logger.debug("Error processing query: %s", e)
+            raise ValueError(f"Error processing query: {str(e)}") from e
+    
+    def _exec_executable(self, state: State, program: tuple) -> Tuple[bool, str]:
+        result = self.executor.check_executable(program, state)
+        return result, EXECUTABLE_EXPLANATIONS[result]
+    
+    def _exec_accessible(self, state: State, goal_state: frozenset, conditions: tuple, program: tuple) -> Tuple[bool, str]:
+        start = state.copy()
+        for fluent, positive in conditions:
+            if positive:
+                start.fluents.add(fluent)
+            else:
+                start.fluents.discard(fluent)
+        result = self.executor.check_accessible(goal_state, program, start)
+        return result, ACCESSIBLE_EXPLANATIONS[result]
+    
+    def _exec_realisable(self, state: State, program: tuple, group: tuple) -> Tuple[bool, str]:
+        result = self.executor.check_realisable(program, group, state)
+        return result, REALISABLE_EXPLANATIONS[result]
+    
+    def _exec_active(self, state: State, agent: str, action: str, group: tuple) -> Tuple[bool, str]:
+        result = self.executor.check_active(agent, action, group)
+        return result, ACTIVE_EXPLANATIONS[result]
     
     def simulate_program(self, program_text: str, initial_state: State) -> List[Dict[str, Set[str]]]:
         """Simulate a program execution and return state history"""
         try:
-            program = self._parse_program(self.parser.parse_action(program_text))
-            states = self.executor.execute_program(program, initial_state)
-            
-            return [
-                {
-                    'fluents': state.fluents,
-                    'released': state.released
-                }
-                for state in states
-            ]
-            
+            return list(self.iter_simulation(program_text, initial_state))
         except ValueError as e:
-            raise ValueError(f"Error simulating program: {str(e)}")
+            raise ValueError(f"Error simulating program: {str(e)}") from e
+    
+    def iter_simulation(self, program_text: str, initial_state: State) -> Iterator[Dict[str, Set[str]]]:
+        """Yield the state history of a program one step at a time"""
+        program = self._parse_program(_split_program(program_text))
+        for state in self.executor.iter_program(program, initial_state):
+            yield {
+                'fluents': state.fluents,
+                'released': state.released
+            }
     
     def _parse_program(self, program_expr) -> List[str]:
         """Convert program expression to list of action names"""
-        if isinstance(program_expr, str):
-            return [program_expr]
-        
-        if hasattr(program_expr, 'name'):
-            return [program_expr.name]
-        
-        actions = []
-        for action in program_expr:
-            if hasattr(action, 'name'):
-                actions.append(action.name)
-            else:
-                actions.append(str(action))
-        return actions 
\ No newline at end of file
+        return PROGRAM_HANDLERS.get(type(program_expr), _program_actions)(program_expr)
@@ -1,7 +1,41 @@
 import os
+import re
 import sqlite3
 import subprocess
 import sys
+from importlib import metadata
+from db.database import SEARCH_INDEX_PATH, read_schema
+
+# "name" or "name>=version"; any other specifier makes us fall back to pip
+REQUIREMENT_RE = re.compile(r"\s*([A-Za-z0-9_.\-]+)\s*(?:>=\s*([0-9][0-9A-Za-z.]*))?\s*")
+
+def _version_tuple(version: str) -> tuple:
+    """Leading numeric release components, e.g. "5.15.9" -> (5, 15, 9)"""
+    parts = []
+    for part in version.split('.'):
+        if not part.isdigit():
+            break
+        parts.append(int(part))
+    return tuple(parts)
+
+def requirements_satisfied(path: str = 'requirements.txt') -> bool:
+    """Check whether every requirement is already installed at a sufficient version"""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            match = REQUIREMENT_RE.fullmatch(line)
+            if match is None:
+                return False
+            name, minimum = match.groups()
+            try:
+                installed = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                return False
+            if minimum and _version_tuple(installed) < _version_tuple(minimum):
+                return False
+    return True
 
 def init_project():
     """Initialize the project environment"""
@@ -17,18 +51,33 @@ def init_project():
     ]
     
     for directory in directories:
+        if os.path.isdir(directory):
+            continue
         os.makedirs(directory, exist_ok=True)
         print(f"Created directory: {directory}")
     
     # Initialize database
     print("\nInitializing database...")
     try:
-        with open('db/schema.sql', 'r') as f:
-            schema = f.read()
+        schema = read_schema() + "\n" + read_schema(SEARCH_INDEX_PATH)
         
-        with sqlite3.connect('db/problems.db') as conn:
-            conn.executescript(schema)
-            print("Database initialized successfully")
+        is_new = not os.path.exists('db/problems.db')
+        # Autocommit mode: the script below manages its own transaction
+        conn = sqlite3.connect('db/problems.db', isolation_level=None)
+        try:
+            if is_new:
+                # Durability is pointless while the file is being created; skip the fsyncs
+                conn.executescript("""
+                    PRAGMA journal_mode=MEMORY;
+                    PRAGMA synchronous=OFF;
+                    PRAGMA temp_store=MEMORY;
+                """)
+            conn.executescript("BEGIN;\n" + schema + "\nCOMMIT;")
+            # Same journal mode the application uses at runtime
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+        print("Database initialized successfully")
     except Exception as e:
         print(f"Error initializing database: {str(e)}")
         return False
@@ -36,8 +85,11 @@ def init_project():
     # Install dependencies
     print("\nInstalling dependencies...")
     try:
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'])
-        print("Dependencies installed successfully")
+        if requirements_satisfied():
+            print("Dependencies already installed")
+        else:
+            subprocess.check_call([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'])
+            print("Dependencies installed successfully")
     except Exception as e:
         print(f"Error installing dependencies: {str(e)}")
         return False
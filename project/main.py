@@ -1,6 +1,6 @@
 import sys
 import os
-import tempfile
+import logging
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -9,6 +9,8 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QTabWidget,
     QTextEdit,
+    QPlainTextEdit,
+    QLineEdit,
     QPushButton,
     QComboBox,
     QLabel,
@@ -23,19 +25,26 @@ from PyQt5.QtWidgets import (
     QGraphicsEllipseItem,
     QGraphicsRectItem,
     QGraphicsLineItem,
-    QGraphicsTextItem,
     QMenu,
     QInputDialog,
     QGroupBox,
+    QOpenGLWidget,
+    QStyleOptionGraphicsItem,
 )
 from PyQt5.QtCore import (
     Qt, 
     QPointF, 
     QRectF,
     QLineF,
+    QEvent,
     QSizeF,
     QMimeData,
     QPoint,
+    QTimer,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    pyqtSignal,
 )
 from PyQt5.QtGui import (
     QFont,
@@ -45,81 +54,405 @@ from PyQt5.QtGui import (
     QTextCharFormat,
     QTextCursor,
     QPixmap,
+    QPixmapCache,
     QImage,
     QPen,
     QBrush,
     QPainter,
     QPainterPath,
+    QPolygonF,
+    QOpenGLContext,
+    QSurfaceFormat,
     QDrag,
     QFontMetrics,
+    QStaticText,
+    QTransform,
 )
-from engine.semantics import ActionSemantics
-from engine.executor import State
 import re
-import graphviz
 import math  # Add import for math functions
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Splits a statement at its "if" keyword (whole word only)
+IF_RE = re.compile(r"\bif\b")
+
+# A causes/impossible statement line: its action (up to any "(") and, for causes, the effect token after it
+DOMAIN_STATEMENT_RE = re.compile(
+    r"^[^\S\n]*(?P<kind>causes|impossible)(?=\s|$)"
+    r"(?:[^\S\n]+(?P<action>[^\s(]*)\S*(?:[^\S\n]+(?P<effect>\S+))?)?[^\n]*$",
+    re.M,
+)
+
+def domain_elements(domain_text):
+    """Action names and condition (fluent) names used by the causes/impossible statements of a domain"""
+    actions = set()
+    conditions = set()
+    for match in DOMAIN_STATEMENT_RE.finditer(domain_text):
+        action = match["action"]
+        if action is None:
+            continue
+        actions.add(action)
+        if match["kind"] == "causes" and match["effect"] is not None:
+            conditions.add(match["effect"])
+        
+        # Extract conditions after "if"
+        split = IF_RE.split(match[0], maxsplit=1)
+        if len(split) == 2:
+            for cond in map(str.strip, split[1].split(",")):
+                if cond.startswith("not "):
+                    cond = cond[4:]
+                conditions.add(cond)
+    return actions, conditions
+
+@contextmanager
+def bulk_edit(editor):
+    """Suspend repaints, signals and undo recording while an editor's contents are replaced"""
+    updates_enabled = editor.updatesEnabled()
+    undo_enabled = editor.isUndoRedoEnabled()
+    editor.setUpdatesEnabled(False)
+    editor.setUndoRedoEnabled(False)  # Also drops the existing undo history
+    signals_blocked = editor.blockSignals(True)
+    try:
+        yield editor
+    finally:
+        editor.blockSignals(signals_blocked)
+        editor.setUndoRedoEnabled(undo_enabled)
+        editor.setUpdatesEnabled(updates_enabled)
+
+# Application-wide dark theme; parsed once by QApplication rather than per window
+DARK_STYLESHEET = """
+    QMainWindow {
+        background-color: #2d2d2d;
+    }
+    QTextEdit, QPlainTextEdit, QLineEdit {
+        background-color: #1e1e1e;
+        color: #ffffff;
+        border: 1px solid #3d3d3d;
+        border-radius: 4px;
+        padding: 5px;
+        font-family: 'Menlo', 'Monaco', 'Courier New', monospace;
+        font-size: 13px;
+    }
+    QLabel {
+        color: #ffffff;
+        font-weight: bold;
+        font-family: 'SF Pro Text', system-ui;
+        font-size: 13px;
+    }
+    QPushButton {
+        background-color: #0078d4;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 6px;
+        font-family: 'SF Pro Text', system-ui;
+    }
+    QPushButton:hover {
+        background-color: #1084d8;
+    }
+    QPushButton:pressed {
+        background-color: #006cbd;
+    }
+    QComboBox {
+        background-color: #1e1e1e;
+        color: white;
+        padding: 5px;
+        border: 1px solid #3d3d3d;
+        border-radius: 6px;
+        font-family: -apple-system, 'SF Pro Text';
+    }
+    QComboBox::drop-down {
+        border: none;
+    }
+    QComboBox::down-arrow {
+        image: none;
+        border: none;
+    }
+    QTabWidget::pane {
+        border: 1px solid #3d3d3d;
+        border-radius: 6px;
+    }
+    QTabBar::tab {
+        background-color: #2d2d2d;
+        color: #ffffff;
+        padding: 8px 16px;
+        margin-right: 2px;
+        border-top-left-radius: 6px;
+        border-top-right-radius: 6px;
+    }
+    QTabBar::tab:selected {
+        background-color: #1e1e1e;
+    }
+    QMenuBar {
+        background-color: #2d2d2d;
+        color: white;
+    }
+    QMenuBar::item {
+        background-color: transparent;
+        padding: 4px 10px;
+    }
+    QMenuBar::item:selected {
+        background-color: #3d3d3d;
+        border-radius: 4px;
+    }
+    QMenu {
+        background-color: #2d2d2d;
+        color: white;
+        border: 1px solid #3d3d3d;
+        border-radius: 6px;
+        padding: 4px;
+    }
+    QMenu::item {
+        padding: 4px 20px;
+        border-radius: 4px;
+    }
+    QMenu::item:selected {
+        background-color: #3d3d3d;
+    }
+    QMenu::separator {
+        height: 1px;
+        background-color: #3d3d3d;
+        margin: 4px 0px;
+    }
+    
+    /* Visual query builder buttons, selected by their "role" property */
+    QPushButton[role="statement"] {
+        background-color: #5F0F40;
+        color: white;
+        border: none;
+        border-radius: 6px;
+    }
+    QPushButton[role="statement"]:hover {
+        background-color: #7F1F50;
+    }
+    QPushButton[role="initial"] {
+        background-color: #4CAF50;
+        color: white;
+        border: none;
+        border-radius: 6px;
+    }
+    QPushButton[role="initial"]:hover {
+        background-color: #45a049;
+    }
+    QPushButton[role="querytype"], QPushButton[role="action"] {
+        background-color: #9A031E;
+        color: white;
+        border: none;
+        border-radius: 6px;
+    }
+    QPushButton[role="querytype"]:hover, QPushButton[role="action"]:hover {
+        background-color: #BA233E;
+    }
+    QPushButton[role="modifier"] {
+        background-color: #CB793A;
+        color: white;
+        border: none;
+        border-radius: 6px;
+    }
+    QPushButton[role="modifier"]:hover {
+        background-color: #DB894A;
+    }
+    QPushButton[role="connector"], QPushButton[role="condition"] {
+        background-color: #FCDC4D;
+        color: black;
+        border: none;
+        border-radius: 6px;
+    }
+    QPushButton[role="connector"]:hover, QPushButton[role="condition"]:hover {
+        background-color: #FFEC5D;
+    }
+    QPushButton[role="clear"] {
+        background-color: #d42828;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 6px;
+        font-weight: bold;
+    }
+    QPushButton[role="clear"]:hover {
+        background-color: #e83838;
+    }
+    QPushButton[role="clear"]:pressed {
+        background-color: #c41818;
+    }
+    QPushButton[role="execute"] {
+        background-color: #0078d4;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 6px;
+        font-weight: bold;
+    }
+    QPushButton[role="execute"]:hover {
+        background-color: #1084d8;
+    }
+"""
+
+# Node type -> (width, height, color)
+NODE_STYLES = {
+    "statement": (120, 40, QColor("#5F0F40")),  # bordowy
+    "action": (100, 40, QColor("#9A031E")),  # czerwony
+    "impossible_action": (100, 40, QColor("#FF0000")),  # jaskrawy czerwony dla zanegowanych akcji
+    "effect": (80, 80, QColor("#CB793A")),  # pomarańczowy
+    "impossible_effect": (80, 80, QColor("#FF4500")),  # jaskrawy pomarańczowy dla zanegowanych efektów
+    "condition": (120, 40, QColor("#FCDC4D")),  # żółty
+    "impossible_condition": (120, 40, QColor("#FFD700")),  # jaskrawy żółty dla zanegowanych warunków
+    "initial": (120, 40, QColor("#4CAF50")),  # zielony dla initial state
+}
+
+# Node types drawn as axis-aligned rectangles; their outlines are crisp without antialiasing
+RECT_NODE_TYPES = frozenset(("action", "impossible_action", "statement"))
+
+DRAG_PIXMAP_CACHE_SIZE = 64
+
+# Nodes and edges keep their rendering in QPixmapCache (DeviceCoordinateCache); Qt's default 10 MB
+# is used up by a few dozen long edges at high zoom, after which items are re-rendered on every repaint
+ITEM_PIXMAP_CACHE_KB = 64 * 1024
+
+# Level of detail (roughly the view scale) below which text is too small to read and is not drawn
+TEXT_MIN_LOD = 0.5
+# Below this, nodes are drawn as filled silhouettes without their (possibly dashed) 4 px border
+OUTLINE_MIN_LOD = 0.25
+# Below this, nodes are a few pixels across and their silhouette is filled as a plain rectangle
+SHAPE_MIN_LOD = 0.1
+
+_DARK_PALETTE = None
+_OPENGL_AVAILABLE = None
+
+def opengl_available() -> bool:
+    """Whether an OpenGL context can be created; probed once per process"""
+    global _OPENGL_AVAILABLE
+    if _OPENGL_AVAILABLE is None:
+        _OPENGL_AVAILABLE = QOpenGLContext().create()
+    return _OPENGL_AVAILABLE
+
+def _make_dark_palette() -> QPalette:
+    """Build the dark palette on first use and hand out the same instance afterwards"""
+    global _DARK_PALETTE
+    if _DARK_PALETTE is not None:
+        return _DARK_PALETTE
+    
+    # Create dark palette
+    dark_palette = QPalette()
+    
+    # Dark mode colors
+    dark_color = QColor(45, 45, 45)
+    disabled_color = QColor(127, 127, 127)
+    text_color = QColor(255, 255, 255)
+    highlight_color = QColor(42, 130, 218)
+    dark_text = QColor(210, 210, 210)
+    
+    # Set colors for different color roles
+    dark_palette.setColor(QPalette.Window, dark_color)
+    dark_palette.setColor(QPalette.WindowText, text_color)
+    dark_palette.setColor(QPalette.Base, QColor(18, 18, 18))
+    dark_palette.setColor(QPalette.AlternateBase, dark_color)
+    dark_palette.setColor(QPalette.ToolTipBase, text_color)
+    dark_palette.setColor(QPalette.ToolTipText, text_color)
+    dark_palette.setColor(QPalette.Text, text_color)
+    dark_palette.setColor(QPalette.Disabled, QPalette.Text, disabled_color)
+    dark_palette.setColor(QPalette.Button, dark_color)
+    dark_palette.setColor(QPalette.ButtonText, text_color)
+    dark_palette.setColor(QPalette.Disabled, QPalette.ButtonText, disabled_color)
+    dark_palette.setColor(QPalette.BrightText, Qt.red)
+    dark_palette.setColor(QPalette.Link, highlight_color)
+    dark_palette.setColor(QPalette.Highlight, highlight_color)
+    dark_palette.setColor(QPalette.HighlightedText, Qt.black)
+    
+    _DARK_PALETTE = dark_palette
+    return dark_palette
+
+# Query/statement keyword -> type of the node that represents it
+NODE_TYPES_BY_TOKEN = {
+    # Statement types
+    "initially": "initial",
+    "causes": "statement",
+    "always": "statement",
+    "impossible": "statement",
+    # Action types
+    "executable": "action",
+    "accessible": "action",
+    "realisable": "action",
+    "active": "action",
+    # Effect types
+    "sometimes": "effect",
+    "not": "effect",
+    # Condition types
+    "if": "condition",
+    "by": "condition",
+    "in": "condition",
+    "from": "condition",
+}
+
+# Run of "not " prefixes at the start of a node's text
+NEGATION_PREFIX_RE = re.compile(r"(?:not )*")
+
+def node_type_for(text):
+    """Determine the node type based on text content"""
+    node_type = NODE_TYPES_BY_TOKEN.get(text)
+    if node_type is not None:
+        return node_type
+    # Negated forms: every leading "not " wraps the type of the rest, except statements
+    prefix_end = NEGATION_PREFIX_RE.match(text).end()
+    # Default to condition for other text
+    base_type = NODE_TYPES_BY_TOKEN.get(text[prefix_end:], "condition")
+    if base_type == "statement":
+        return base_type
+    return "impossible_" * (prefix_end // len("not ")) + base_type
+
+# Color palette for syntax only
+HIGHLIGHT_COLORS = {
+    'keywords': '#5F0F40',    # bordowy - dla słów kluczowych
+    'agents': '#9A031E',      # czerwony - dla agentów
+    'fluents': '#CB793A',     # pomarańczowy - dla fluentów
+    'conditions': '#FCDC4D',   # żółty - dla warunków
+    'initial': '#4CAF50'      # zielony - dla initial state
+}
+
+# (pattern, color name) in application order; the keywords share one alternation so a block is scanned once for them
+HIGHLIGHT_PATTERNS = (
+    (re.compile(r'\b(?:causes|impossible|always|if|by|in|from|initially)\b'), 'keywords'),
+    # Initial state (after initially)
+    (re.compile(r'(?<=initially\s)(.+)$', re.MULTILINE), 'initial'),
+    # Agents and actions (inside parentheses)
+    (re.compile(r'\([^)]+\)'), 'agents'),
+    # Fluents and effects (words after causes)
+    (re.compile(r'(?<=causes\s)(\w+(?:\([^)]*\))?)\s+(\w+)'), 'fluents'),
+    # Conditions (after if)
+    (re.compile(r'(?<=if\s)(.+)$', re.MULTILINE), 'conditions'),
+)
+
+# Keywords and initial state are drawn in bold
+BOLD_HIGHLIGHTS = {'keywords', 'initial'}
+
+_HIGHLIGHTING_RULES = None
+
+def _highlighting_rules():
+    """(pattern, QTextCharFormat) pairs, built on first use and shared by every highlighter"""
+    global _HIGHLIGHTING_RULES
+    if _HIGHLIGHTING_RULES is None:
+        rules = []
+        for pattern, color in HIGHLIGHT_PATTERNS:
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(HIGHLIGHT_COLORS[color]))
+            if color in BOLD_HIGHLIGHTS:
+                text_format.setFontWeight(QFont.Bold)
+            rules.append((pattern, text_format))
+        _HIGHLIGHTING_RULES = tuple(rules)
+    return _HIGHLIGHTING_RULES
 
 class SyntaxHighlighter(QSyntaxHighlighter):
     def __init__(self, parent=None):
         super().__init__(parent)
-        
-        # Color palette for syntax only
-        self.colors = {
-            'keywords': '#5F0F40',    # bordowy - dla słów kluczowych
-            'agents': '#9A031E',      # czerwony - dla agentów
-            'fluents': '#CB793A',     # pomarańczowy - dla fluentów
-            'conditions': '#FCDC4D',   # żółty - dla warunków
-            'initial': '#4CAF50'      # zielony - dla initial state
-        }
-        
-        # Keyword patterns
-        self.highlighting_rules = []
-        
-        # Keywords format (causes, impossible, always, if)
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor(self.colors['keywords']))
-        keyword_format.setFontWeight(QFont.Bold)
-        keywords = ['causes', 'impossible', 'always', 'if', 'by', 'in', 'from', 'initially']
-        for word in keywords:
-            pattern = f'\\b{word}\\b'
-            self.highlighting_rules.append((re.compile(pattern), keyword_format))
-        
-        # Initial state format
-        initial_format = QTextCharFormat()
-        initial_format.setForeground(QColor(self.colors['initial']))
-        initial_format.setFontWeight(QFont.Bold)
-        self.highlighting_rules.append((
-            re.compile(r'(?<=initially\s)(.+)$', re.MULTILINE),
-            initial_format
-        ))
-        
-        # Agents and actions format (inside parentheses)
-        agent_format = QTextCharFormat()
-        agent_format.setForeground(QColor(self.colors['agents']))
-        self.highlighting_rules.append((re.compile(r'\([^)]+\)'), agent_format))
-        
-        # Fluents and effects format (words after causes/impossible)
-        fluent_format = QTextCharFormat()
-        fluent_format.setForeground(QColor(self.colors['fluents']))
-        self.highlighting_rules.append((
-            re.compile(r'(?<=causes\s)(\w+(?:\([^)]*\))?)\s+(\w+)'),
-            fluent_format
-        ))
-        
-        # Conditions format (after if)
-        condition_format = QTextCharFormat()
-        condition_format.setForeground(QColor(self.colors['conditions']))
-        self.highlighting_rules.append((
-            re.compile(r'(?<=if\s)(.+)$', re.MULTILINE),
-            condition_format
-        ))
-
+        self.highlighting_rules = _highlighting_rules()
+    
     def highlightBlock(self, text):
         for pattern, format in self.highlighting_rules:
             for match in pattern.finditer(text):
                 self.setFormat(match.start(), match.end() - match.start(), format)
 
-class SyntaxTextEdit(QTextEdit):
+class SyntaxTextEdit(QPlainTextEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.highlighter = SyntaxHighlighter(self.document())
@@ -130,10 +463,16 @@ class SyntaxTextEdit(QTextEdit):
         self.setFont(font)
 
 class GraphNode(QGraphicsItem):
+    # Per-type geometry (outline rect, bounding rect, outline path, border pen); none of it changes once a node is built
+    _type_geometry = {}
+    # Drag previews keyed by (node_type, text); editing a node's text simply maps it to a new key
+    _drag_pixmaps = {}
+    _TEXT_PEN = QPen(Qt.black)
+    
     def __init__(self, text, node_type="action", parent=None):
         super().__init__(parent)
-        self.text = text
         self.node_type = node_type
+        self.text = text
         self.setFlag(QGraphicsItem.ItemIsMovable)
         self.setFlag(QGraphicsItem.ItemIsSelectable)
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges)
@@ -145,58 +484,56 @@ class GraphNode(QGraphicsItem):
         self.being_dragged = False  # New flag to prevent recursive dragging
         
         # Style based on type
-        if node_type == "statement":
-            self.width = 120
-            self.height = 40
-            self.color = QColor("#5F0F40")  # bordowy
-        elif node_type == "action":
-            self.width = 100
-            self.height = 40
-            self.color = QColor("#9A031E")  # czerwony
-        elif node_type == "impossible_action":
-            self.width = 100
-            self.height = 40
-            self.color = QColor("#FF0000")  # jaskrawy czerwony dla zanegowanych akcji
-        elif node_type == "effect":
-            self.width = 80
-            self.height = 80
-            self.color = QColor("#CB793A")  # pomarańczowy
-        elif node_type == "impossible_effect":
-            self.width = 80
-            self.height = 80
-            self.color = QColor("#FF4500")  # jaskrawy pomarańczowy dla zanegowanych efektów
-        elif node_type == "condition":
-            self.width = 120
-            self.height = 40
-            self.color = QColor("#FCDC4D")  # żółty
-        elif node_type == "impossible_condition":
-            self.width = 120
-            self.height = 40
-            self.color = QColor("#FFD700")  # jaskrawy żółty dla zanegowanych warunków
-        elif node_type == "initial":
-            self.width = 120
-            self.height = 40
-            self.color = QColor("#4CAF50")  # zielony dla initial state
+        self.width, self.height, self.color = NODE_STYLES[node_type]
         
         self.edges = []
+        # Position changes only schedule an edge update; the timer fires once the event loop has drained the pending moves
+        self._update_timer = QTimer()
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(0)
+        self._update_timer.timeout.connect(self._flush_edges)
+        
+        # Everything paint() needs depends only on the type, so build it once per type and share it
+        geometry = self._type_geometry.get(node_type)
+        if geometry is None:
+            geometry = self._type_geometry[node_type] = self._build_type_geometry()
+        self.outline_rect, self._bounding_rect, self._shape_path, self._border_pen = geometry
+        # Only curved and slanted outlines are worth antialiasing
+        self._antialias = node_type not in RECT_NODE_TYPES
+        
+        # Let Qt keep the rendered node as a pixmap and only call paint() again when it changes
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
     
-    def boundingRect(self):
-        return QRectF(-self.width/2, -self.height/2, self.width, self.height)
+    @property
+    def text(self):
+        return self._text
     
-    def paint(self, painter, option, widget):
-        # Set thicker border (4 pixels)
-        pen = QPen(self.color, 4)
-        
-        # Use dashed line for impossible (negated) nodes
-        if self.node_type.startswith("impossible_"):
-            pen.setStyle(Qt.DashLine)
-        
-        painter.setPen(pen)
-        
+    @text.setter
+    def text(self, text):
+        self._text = text
+        # Impossible nodes are displayed with a "not" prefix
+        self._display_text = "not " + text if self.node_type.startswith("impossible_") else text
+        self.update()  # Invalidates the cached pixmap
+        scene = self.scene()
+        if isinstance(scene, GraphScene):
+            scene.invalidate_node_text(self)
+            scene.mark_node_dirty(self)
+    
+    def _build_type_geometry(self):
+        """Rects, outline path and border pen shared by all nodes of this node's type"""
+        self.outline_rect = QRectF(-self.width/2, -self.height/2, self.width, self.height)
+        # Half of the 4 px border lies outside the outline; the item cache would clip it otherwise
+        bounding_rect = self.outline_rect.adjusted(-2, -2, 2, 2)
+        # Set thicker border (4 pixels); dashed line for impossible (negated) nodes
+        style = Qt.DashLine if self.node_type.startswith("impossible_") else Qt.SolidLine
+        return self.outline_rect, bounding_rect, self._build_shape_path(), QPen(self.color, 4, style)
+    
+    def _build_shape_path(self):
+        """Outline of the node for its type"""
+        path = QPainterPath()
+        w, h = self.width/2, self.height/2
         if self.node_type == "initial":
-            # Draw hexagon for initial state
-            path = QPainterPath()
-            w, h = self.width/2, self.height/2
+            # Hexagon for initial state
             path.moveTo(-w, 0)
             path.lineTo(-w/2, -h)
             path.lineTo(w/2, -h)
@@ -204,23 +541,56 @@ class GraphNode(QGraphicsItem):
             path.lineTo(w/2, h)
             path.lineTo(-w/2, h)
             path.closeSubpath()
-            painter.drawPath(path)
-        elif self.node_type in ["action", "impossible_action", "statement"]:
-            painter.drawRect(self.boundingRect())
+        elif self.node_type in RECT_NODE_TYPES:
+            path.addRect(self.outline_rect)
         elif self.node_type in ["effect", "impossible_effect"]:
-            painter.drawEllipse(self.boundingRect())
+            path.addEllipse(self.outline_rect)
         elif self.node_type in ["condition", "impossible_condition"]:
-            painter.drawPolygon([
-                QPointF(-self.width/2, 0),
-                QPointF(0, -self.height/2),
-                QPointF(self.width/2, 0),
-                QPointF(0, self.height/2),
-            ])
-        
-        # Draw text with "not" prefix for impossible nodes
-        painter.setPen(QPen(Qt.black))  # Reset pen for text
-        text_to_display = "not " + self.text if self.node_type.startswith("impossible_") else self.text
-        painter.drawText(self.boundingRect(), Qt.AlignCenter, text_to_display)
+            path.addPolygon(QPolygonF([
+                QPointF(-w, 0),
+                QPointF(0, -h),
+                QPointF(w, 0),
+                QPointF(0, h),
+            ]))
+            path.closeSubpath()
+        return path
+    
+    def boundingRect(self):
+        return self._bounding_rect
+    
+    def paint(self, painter, option, widget):
+        painter.setRenderHint(QPainter.Antialiasing, self._antialias)
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < SHAPE_MIN_LOD:
+            painter.fillRect(self.outline_rect, self.color)
+            return
+        if lod < OUTLINE_MIN_LOD:
+            painter.fillPath(self._shape_path, self.color)
+            return
+        
+        painter.setPen(self._border_pen)
+        painter.drawPath(self._shape_path)
+        if lod < TEXT_MIN_LOD:
+            return
+        
+        painter.setPen(self._TEXT_PEN)  # Reset pen for text
+        painter.drawText(self.outline_rect, Qt.AlignCenter, self._display_text)
+    
+    def drag_pixmap(self):
+        """Pixmap of the node for drag visualization, shared by nodes with the same type and text"""
+        key = (self.node_type, self.text)
+        pixmap = self._drag_pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(self.boundingRect().size().toSize())
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            self.paint(painter, None, None)
+            painter.end()
+            if len(self._drag_pixmaps) >= DRAG_PIXMAP_CACHE_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._drag_pixmaps[next(iter(self._drag_pixmaps))]
+            self._drag_pixmaps[key] = pixmap
+        return pixmap
     
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -247,13 +617,7 @@ class GraphNode(QGraphicsItem):
                     mime_data.setText(f"{self.node_type}:{self.text}")
                 drag.setMimeData(mime_data)
                 
-                # Create pixmap of the node for drag visualization
-                pixmap = QPixmap(self.boundingRect().size().toSize())
-                pixmap.fill(Qt.transparent)
-                painter = QPainter(pixmap)
-                self.paint(painter, None, None)
-                painter.end()
-                
+                pixmap = self.drag_pixmap()
                 drag.setPixmap(pixmap)
                 drag.setHotSpot(QPoint(int(pixmap.width()/2), int(pixmap.height()/2)))
                 
@@ -263,6 +627,7 @@ class GraphNode(QGraphicsItem):
             else:
                 # We're on the canvas - just move the node
                 self.dragging = True
+                self._press_pos = self.pos()
                 super().mousePressEvent(event)
         
         elif event.button() == Qt.RightButton:
@@ -283,6 +648,7 @@ class GraphNode(QGraphicsItem):
             elif action == delete_action:
                 scene = self.scene()
                 if scene:
+                    scene.invalidate_node_text(self)
                     for edge in self.edges:
                         scene.removeItem(edge)
                     scene.removeItem(self)
@@ -292,21 +658,29 @@ class GraphNode(QGraphicsItem):
         if event.button() == Qt.LeftButton and self.dragging:
             self.dragging = False
             # Update connected edges
-            for edge in self.edges:
-                edge.updatePosition()
-            # Update query text
-            if self.scene():
-                for view in self.scene().views():
-                    if view and isinstance(view.parent(), VisualQueryBuilder):
-                        view.parent().update_query_text()
+            self._flush_edges()
+            # Update query text; it follows the nodes' rows and order, so a click that left the node in place changes nothing
+            scene = self.scene()
+            if self.pos() != self._press_pos and scene and scene.builder:
+                scene.builder.update_query_text()
         super().mouseReleaseEvent(event)
     
     def mouseMoveEvent(self, event):
         if self.dragging:
             super().mouseMoveEvent(event)
             # Update connected edges while dragging
-            for edge in self.edges:
-                edge.updatePosition()
+            self._schedule_edge_update()
+    
+    def _schedule_edge_update(self):
+        """Update the connected edges once per event loop turn, however many times the node moves in it"""
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+    
+    def _flush_edges(self):
+        """Bring the connected edges up to date with the node's position"""
+        self._update_timer.stop()
+        for edge in self.edges:
+            edge.updatePosition()
     
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemPositionChange and self.scene():
@@ -319,143 +693,175 @@ class GraphNode(QGraphicsItem):
                 new_pos = QPointF(new_pos.x(), new_y)
             
             # Update edges
-            for edge in self.edges:
-                edge.updatePosition()
+            self._schedule_edge_update()
             
             return new_pos
+        # Keep the scene's index of nodes by row up to date
+        if change == QGraphicsItem.ItemPositionHasChanged:
+            scene = self.scene()
+            if isinstance(scene, GraphScene):
+                scene.move_node_in_index(self)
+        elif change == QGraphicsItem.ItemSceneChange:
+            scene = self.scene()
+            if isinstance(scene, GraphScene):
+                scene.remove_node_from_index(self)
+        elif change == QGraphicsItem.ItemSceneHasChanged:
+            if isinstance(value, GraphScene):
+                value.add_node_to_index(self)
         return super().itemChange(change, value)
 
 class GraphEdge(QGraphicsLineItem):
+    # Pens shared by all edges; unknown types are drawn like "causes"
+    _PENS = {
+        "causes": QPen(QColor("#5F0F40"), 3),  # bordowy, thicker
+        "impossible": QPen(QColor("#9A031E"), 3, Qt.DashLine),  # czerwony, thicker
+        "requires": QPen(QColor("#CB793A"), 3),  # pomarańczowy
+    }
+    _LABEL_FONT = None
+    # Laid-out relationship labels keyed by their text
+    _labels = {}
+    # Padding around a label, as a text document would add
+    LABEL_MARGIN = 4
+    
+    @classmethod
+    def _label_font(cls):
+        """Font of the relationship labels, built on first use (fonts need a running QApplication)"""
+        if cls._LABEL_FONT is None:
+            font = QFont("Arial", 12)  # Increased from 10 to 12
+            font.setBold(True)
+            font.setWeight(QFont.ExtraBold)  # Make it extra bold for better visibility
+            cls._LABEL_FONT = font
+        return cls._LABEL_FONT
+    
+    @classmethod
+    def _label(cls, text):
+        """Static text for a relationship label, shaped once and shared by all edges showing it"""
+        label = cls._labels.get(text)
+        if label is None:
+            label = QStaticText(text)
+            label.setPerformanceHint(QStaticText.AggressiveCaching)
+            label.prepare(QTransform(), cls._label_font())
+            cls._labels[text] = label
+        return label
+    
     def __init__(self, source_node, target_node, edge_type="causes", parent=None):
         super().__init__(parent)
         self.source_node = source_node
         self.target_node = target_node
         self.edge_type = edge_type
         self.setFlag(QGraphicsItem.ItemIsSelectable)
+        # Repainted from the cached pixmap until the line or its style changes
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         
         # Add to nodes' edges lists
         source_node.edges.append(self)
         target_node.edges.append(self)
+        scene = source_node.scene()
+        if isinstance(scene, GraphScene):
+            scene.invalidate_node_text(target_node)
         
         # Style based on type with thicker lines
-        if edge_type == "causes":
-            self.setPen(QPen(QColor("#5F0F40"), 3))  # bordowy, thicker
-            self.relationship_text = "causes"
-        elif edge_type == "impossible":
-            self.setPen(QPen(QColor("#9A031E"), 3, Qt.DashLine))  # czerwony, thicker
-            self.relationship_text = "impossible"
-        elif edge_type == "requires":
-            self.setPen(QPen(QColor("#CB793A"), 3))  # pomarańczowy
-            self.relationship_text = "requires"
-        else:
-            self.setPen(QPen(QColor("#5F0F40"), 3))
-            self.relationship_text = edge_type
-        
-        # Create text item for the relationship
-        self.text_item = QGraphicsTextItem(self)
-        self.text_item.setDefaultTextColor(self.pen().color())
-        self.text_item.setPlainText(self.relationship_text)
-        # Set font for the text
-        font = QFont("Arial", 12)  # Increased from 10 to 12
-        font.setBold(True)
-        font.setWeight(QFont.ExtraBold)  # Make it extra bold for better visibility
-        self.text_item.setFont(font)
-        
+        self.setPen(self._PENS.get(edge_type, self._PENS["causes"]))
+        self.relationship_text = edge_type
+        
+        # The relationship label is drawn by paint() rather than by a child text item
+        self._static_label = self._label(self.relationship_text)
+        size = self._static_label.size()
+        self._label_size = QSizeF(size.width() + 2 * self.LABEL_MARGIN, size.height() + 2 * self.LABEL_MARGIN)
+        self._label_transform = QTransform()
+        self._label_rect = QRectF()
+        
+        # Node positions the geometry was last computed for
+        self._last_src = None
+        self._last_dst = None
         self.updatePosition()
     
     def intersectWithNode(self, node, line):
         """Calculate intersection point with node boundary"""
-        node_rect = node.boundingRect().translated(node.pos())
+        # line starts at the node's center; solve for its boundary in closed form instead of intersecting edges
         center = node.pos()
+        dx, dy = line.dx(), line.dy()
+        if dx == 0 and dy == 0:
+            return center
+        half_width, half_height = node.width / 2, node.height / 2
         
         if node.node_type == "action":
-            # For rectangular nodes (actions)
-            points = [
-                QPointF(node_rect.left(), node_rect.top()),
-                QPointF(node_rect.right(), node_rect.top()),
-                QPointF(node_rect.right(), node_rect.bottom()),
-                QPointF(node_rect.left(), node_rect.bottom())
-            ]
-            # Check intersection with each edge of rectangle
-            for i in range(4):
-                edge_line = QLineF(points[i], points[(i + 1) % 4])
-                intersection_point = QPointF()
-                if edge_line.intersect(line, intersection_point) == QLineF.BoundedIntersection:
-                    return intersection_point
-                    
+            # Rectangle: the direction reaches the nearer pair of sides first
+            scale = max(abs(dx) / half_width, abs(dy) / half_height)
         elif node.node_type == "effect":
-            # For circular nodes (effects)
-            radius = node.width / 2
-            dx = line.dx()
-            dy = line.dy()
-            if dx == 0 and dy == 0:
-                return center
-                
-            # Normalize direction vector
-            length = (dx * dx + dy * dy) ** 0.5
-            dx /= length
-            dy /= length
-            
-            # Calculate intersection point
-            return QPointF(
-                center.x() + dx * radius,
-                center.y() + dy * radius
-            )
-            
+            # Circle
+            radius = half_width
+            length = math.hypot(dx, dy)
+            return QPointF(center.x() + dx * radius / length, center.y() + dy * radius / length)
         elif node.node_type == "condition":
-            # For diamond nodes (conditions)
-            points = [
-                QPointF(center.x() - node.width/2, center.y()),
-                QPointF(center.x(), center.y() - node.height/2),
-                QPointF(center.x() + node.width/2, center.y()),
-                QPointF(center.x(), center.y() + node.height/2)
-            ]
-            # Check intersection with each edge of diamond
-            for i in range(4):
-                edge_line = QLineF(points[i], points[(i + 1) % 4])
-                intersection_point = QPointF()
-                if edge_line.intersect(line, intersection_point) == QLineF.BoundedIntersection:
-                    return intersection_point
-        
-        return center  # Fallback to center if no intersection found
+            # Diamond: |x| / half_width + |y| / half_height = 1
+            scale = abs(dx) / half_width + abs(dy) / half_height
+        else:
+            return center
+        
+        if scale < 1:
+            return center  # The other end lies inside this node, so the line never crosses its boundary
+        return QPointF(center.x() + dx / scale, center.y() + dy / scale)
     
     def updatePosition(self):
+        src, dst = self.source_node.pos(), self.target_node.pos()
+        if src == self._last_src and dst == self._last_dst:
+            return  # Neither end moved since the last update
+        self._last_src, self._last_dst = src, dst
+        
         # Create a line from source to target center
-        line = QLineF(self.source_node.pos(), self.target_node.pos())
+        line = QLineF(src, dst)
         
         # Get intersection points with both nodes
         start_point = self.intersectWithNode(self.source_node, line)
-        end_point = self.intersectWithNode(self.target_node, QLineF(self.target_node.pos(), self.source_node.pos()))
-        
-        # Update line position
-        self.setLine(QLineF(start_point, end_point))
+        end_point = self.intersectWithNode(self.target_node, QLineF(dst, src))
         
         # Update text position - place it in the middle of the line
-        if self.text_item:
-            text_pos = QPointF(
-                (start_point.x() + end_point.x()) / 2,
-                (start_point.y() + end_point.y()) / 2
-            )
-            # Offset the text slightly above the line
-            angle = line.angle()
-            offset = 15  # pixels
-            angle_rad = math.radians(angle)
-            text_pos += QPointF(
-                -offset * math.sin(angle_rad),
-                offset * math.cos(angle_rad)
-            )
-            
-            # Center the text on its position
-            text_rect = self.text_item.boundingRect()
-            text_pos -= QPointF(text_rect.width() / 2, text_rect.height() / 2)
-            self.text_item.setPos(text_pos)
-            
-            # Rotate text to match line angle if needed
-            if 90 < angle < 270:
-                # Flip text if line is going "backwards"
-                self.text_item.setRotation(angle + 180)
-            else:
-                self.text_item.setRotation(angle)
+        text_pos = QPointF(
+            (start_point.x() + end_point.x()) / 2,
+            (start_point.y() + end_point.y()) / 2
+        )
+        # Offset the text slightly above the line, using the line's unit direction (ux, uy)
+        # rather than trigonometry on its angle; a zero-length line has angle 0, i.e. (1, 0)
+        angle = line.angle()
+        offset = 15  # pixels
+        length = line.length()
+        ux, uy = (line.dx() / length, line.dy() / length) if length else (1.0, 0.0)
+        text_pos += QPointF(offset * uy, offset * ux)
+        
+        # Center the text on its position
+        text_pos -= QPointF(self._label_size.width() / 2, self._label_size.height() / 2)
+        
+        # Rotate text to match line angle if needed
+        if 90 < angle < 270:
+            # Flip text if line is going "backwards"
+            rotation = angle + 180
+        else:
+            rotation = angle
+        
+        # The label is part of the edge's bounding rect, so announce the change before moving it
+        self.prepareGeometryChange()
+        self._label_transform = QTransform().translate(text_pos.x(), text_pos.y()).rotate(rotation)
+        self._label_rect = self._label_transform.mapRect(QRectF(QPointF(0, 0), self._label_size))
+        
+        # Update line position; horizontal and vertical lines are crisp without antialiasing
+        self._antialias = start_point.x() != end_point.x() and start_point.y() != end_point.y()
+        self.setLine(QLineF(start_point, end_point))
+    
+    def boundingRect(self):
+        return super().boundingRect().united(self._label_rect)
+    
+    def paint(self, painter, option, widget=None):
+        painter.setRenderHint(QPainter.Antialiasing, self._antialias)
+        super().paint(painter, option, widget)
+        if QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) < TEXT_MIN_LOD:
+            return
+        painter.save()
+        painter.setTransform(self._label_transform, True)
+        painter.setFont(self._label_font())
+        painter.setPen(self.pen().color())
+        painter.drawStaticText(QPointF(self.LABEL_MARGIN, self.LABEL_MARGIN), self._static_label)
+        painter.restore()
     
     def mousePressEvent(self, event):
         if event.button() == Qt.RightButton:
@@ -468,8 +874,10 @@ class GraphEdge(QGraphicsLineItem):
                 new_type, ok = QInputDialog.getText(None, "Edit Edge", "Enter edge type:", text=self.edge_type)
                 if ok:
                     self.edge_type = new_type
+                    self.update()
                     self.scene().update_text_from_graph()
             elif action == delete_action:
+                self.scene().invalidate_node_text(self.target_node)
                 self.source_node.edges.remove(self)
                 self.target_node.edges.remove(self)
                 self.scene().removeItem(self)
@@ -483,49 +891,147 @@ class GraphScene(QGraphicsScene):
         self.setSceneRect(-400, -300, 800, 600)
         self.line_spacing = 80  # Increased spacing between lines
         self.snap_threshold = 40  # Increased snap threshold
-        self.grid_lines = []  # Store grid lines
-        self.line_y_positions = []  # Store Y positions of lines
+        # Make lines more visible: darker gray, dashed
+        self.grid_pen = QPen(QColor("#A0A0A0"), 1, Qt.DashLine)
+        self.line_y_positions = ()  # Store Y positions of lines
+        # Action node -> its lines of text, rebuilt only after invalidate_node_text
+        self._node_text_cache = {}
+        self.builder = None  # VisualQueryBuilder editing this scene, if any
+        # Y position -> nodes at that position (kept in insertion order), maintained by the nodes as they move
+        self._nodes_by_y = {}
+        # Every node in the scene, oldest first (the order Qt stacks them in)
+        self._nodes = {}
+        # Y positions of rows whose nodes changed since the last take_dirty_ys()
+        self._dirty_ys = set()
         self.update_grid_lines()
     
     def update_grid_lines(self):
-        # Clear existing grid lines
-        for line in self.grid_lines:
-            self.removeItem(line)
-        self.grid_lines.clear()
-        self.line_y_positions.clear()
-        
-        # Create horizontal grid lines
+        """Recompute the horizontal grid lines; they are painted by drawBackground rather than being scene items"""
         rect = self.sceneRect()
         num_lines = int(rect.height() / self.line_spacing)
         start_y = rect.top() + self.line_spacing  # Start below the top edge
+        # Lines are evenly spaced, so get_nearest_line_y can compute the nearest one directly;
+        # the positions are a read-only tuple so they cannot drift from start_y and num_lines
+        self._grid_start_y = start_y
+        self._num_lines = num_lines
+        self.line_y_positions = tuple(start_y + i * self.line_spacing for i in range(num_lines))
+        # Drop the views' cached background so the new grid is painted
+        self.invalidate(self.sceneRect(), QGraphicsScene.BackgroundLayer)
+    
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
         
-        for i in range(num_lines):
-            y = start_y + i * self.line_spacing
-            line = QGraphicsLineItem(rect.left(), y, rect.right(), y)
-            # Make lines more visible
-            line.setPen(QPen(QColor("#A0A0A0"), 1, Qt.DashLine))  # Darker gray, dashed line
-            line.setZValue(-1)  # Put lines behind other items
-            self.addItem(line)
-            self.grid_lines.append(line)
-            self.line_y_positions.append(y)
+        # Only the grid lines crossing the exposed rect are drawn
+        first = max(0, math.ceil((rect.top() - self._grid_start_y) / self.line_spacing))
+        last = min(self._num_lines - 1, math.floor((rect.bottom() - self._grid_start_y) / self.line_spacing))
+        if first > last:
+            return
+        scene_rect = self.sceneRect()
+        # The grid lines are horizontal, so they stay crisp without antialiasing
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setPen(self.grid_pen)
+        painter.drawLines([
+            QLineF(scene_rect.left(), y, scene_rect.right(), y)
+            for y in self.line_y_positions[first:last + 1]
+        ])
+    
+    def add_node_to_index(self, node):
+        """Record a node that has just been added to the scene"""
+        self._nodes[node] = None
+        self._add_to_row(node)
+    
+    def remove_node_from_index(self, node):
+        """Forget a node that is leaving the scene"""
+        self._nodes.pop(node, None)
+        self._remove_from_row(node)
+    
+    def move_node_in_index(self, node):
+        """Move a node to the row of its current position"""
+        if node.pos().y() != node._indexed_y:
+            self._remove_from_row(node)
+            self._add_to_row(node)
+        else:
+            self._dirty_ys.add(node._indexed_y)  # Its X position orders the row
+    
+    def mark_node_dirty(self, node):
+        """Flag the row of a node whose text changed"""
+        if node in self._nodes:
+            self._dirty_ys.add(node._indexed_y)
+    
+    def take_dirty_ys(self):
+        """Y positions of the rows changed since the previous call"""
+        dirty, self._dirty_ys = self._dirty_ys, set()
+        return dirty
+    
+    def _add_to_row(self, node):
+        node._indexed_y = y = node.pos().y()
+        self._nodes_by_y.setdefault(y, {})[node] = None
+        self._dirty_ys.add(y)
+    
+    def _remove_from_row(self, node):
+        self._dirty_ys.add(node._indexed_y)
+        nodes = self._nodes_by_y.get(node._indexed_y)
+        if nodes is not None:
+            nodes.pop(node, None)
+            if not nodes:
+                del self._nodes_by_y[node._indexed_y]
+    
+    def clear(self):
+        # Items deleted by clear() do not report leaving the scene
+        self._nodes_by_y = {}
+        self._nodes = {}
+        self._dirty_ys = set()
+        self._node_text_cache = {}
+        super().clear()
+    
+    def nodes(self):
+        """All nodes in the scene in stacking order, topmost (newest) first like items()"""
+        return reversed(self._nodes)
+    
+    def bottom_toolbox_node(self):
+        """The lowest stacked (oldest) toolbox item, or None"""
+        return next((node for node in self._nodes if node.is_toolbox_item), None)
+    
+    def nodes_near_y(self, y_pos, tolerance):
+        """Canvas nodes (not toolbox items) whose Y position lies strictly within tolerance of y_pos"""
+        return [
+            node
+            for y, nodes in self._nodes_by_y.items() if abs(y - y_pos) < tolerance
+            for node in nodes if not node.is_toolbox_item
+        ]
+    
+    def row_ys(self, tolerance):
+        """Y positions of the canvas nodes (not toolbox items) grouped into rows from top to bottom"""
+        # A row starts at its topmost node and takes every node at most tolerance below it
+        rows = []
+        row_y = None
+        for y in sorted(self._nodes_by_y):
+            if all(node.is_toolbox_item for node in self._nodes_by_y[y]):
+                continue
+            if row_y is None or y - row_y > tolerance:
+                row_y = y
+                rows.append([])
+            rows[-1].append(y)
+        return [tuple(ys) for ys in rows]
+    
+    def row_nodes(self, ys):
+        """Canvas nodes at the given Y positions, sorted by X position"""
+        nodes = [node for y in ys for node in self._nodes_by_y[y] if not node.is_toolbox_item]
+        nodes.sort(key=lambda node: node.pos().x())
+        return nodes
     
     def get_nearest_line_y(self, y_pos):
         """Get the Y coordinate of the nearest grid line"""
-        if not self.line_y_positions:
+        if not self._num_lines:
             return y_pos
-            
-        # Find the closest line
-        closest_y = None
-        min_distance = float('inf')
         
-        for line_y in self.line_y_positions:
-            distance = abs(line_y - y_pos)
-            if distance < min_distance:
-                min_distance = distance
-                closest_y = line_y
+        # Index of the closest line, clamped to the grid; halfway between two lines picks the one above
+        index = math.ceil((y_pos - self._grid_start_y) / self.line_spacing - 0.5)
+        index = max(0, min(index, self._num_lines - 1))
+        closest_y = self._grid_start_y + index * self.line_spacing
         
         # Only snap if we're within the threshold
-        if min_distance <= self.snap_threshold:
+        if abs(closest_y - y_pos) <= self.snap_threshold:
             return closest_y
         return y_pos
     
@@ -547,10 +1053,9 @@ class GraphScene(QGraphicsScene):
             if ":" in text:
                 node_type, text = text.split(":", 1)
             else:
-                # Get the parent VisualQueryBuilder to determine node type
-                view = self.views()[0]
-                if view and isinstance(view.parent(), VisualQueryBuilder):
-                    node_type = view.parent().get_node_type(text)
+                # Get the VisualQueryBuilder to determine node type
+                if self.builder:
+                    node_type = self.builder.get_node_type(text)
                 else:
                     node_type = "action"  # default type
             
@@ -560,9 +1065,8 @@ class GraphScene(QGraphicsScene):
             node.setPos(pos)
             
             # Update the query text
-            view = self.views()[0]
-            if view and isinstance(view.parent(), VisualQueryBuilder):
-                view.parent().update_query_text()
+            if self.builder:
+                self.builder.update_query_text()
             
             event.acceptProposedAction()
     
@@ -599,36 +1103,72 @@ class GraphScene(QGraphicsScene):
         else:
             super().mousePressEvent(event)
     
+    def invalidate_node_text(self, node):
+        """Forget the cached text of every action node whose text mentions node"""
+        # An action's text covers its effects and their conditions, so walk up to two edges backwards
+        self._node_text_cache.pop(node, None)
+        for edge in node.edges:
+            if edge.target_node is node:
+                source = edge.source_node
+                self._node_text_cache.pop(source, None)
+                for source_edge in source.edges:
+                    if source_edge.target_node is source:
+                        self._node_text_cache.pop(source_edge.source_node, None)
+    
+    @staticmethod
+    def _action_text(node):
+        """Text representation of one action node"""
+        text = ""
+        # Find connected effects and conditions
+        for edge in node.edges:
+            if isinstance(edge.target_node, GraphNode):
+                if edge.target_node.node_type == "effect":
+                    text += f"causes {node.text} {edge.target_node.text}"
+                    # Find conditions
+                    conditions = []
+                    for cond_edge in edge.target_node.edges:
+                        if isinstance(cond_edge.target_node, GraphNode) and cond_edge.target_node.node_type == "condition":
+                            conditions.append(cond_edge.target_node.text)
+                    if conditions:
+                        text += f" if {', '.join(conditions)}"
+                    text += "\n"
+        return text
+    
     def update_text_from_graph(self):
         """Convert graph to text representation"""
-        text = ""
-        for item in self.items():
-            if isinstance(item, GraphNode):
-                if item.node_type == "action":
-                    # Find connected effects and conditions
-                    for edge in item.edges:
-                        if isinstance(edge.target_node, GraphNode):
-                            if edge.target_node.node_type == "effect":
-                                text += f"causes {item.text} {edge.target_node.text}"
-                                # Find conditions
-                                conditions = []
-                                for cond_edge in edge.target_node.edges:
-                                    if isinstance(cond_edge.target_node, GraphNode) and cond_edge.target_node.node_type == "condition":
-                                        conditions.append(cond_edge.target_node.text)
-                                if conditions:
-                                    text += f" if {', '.join(conditions)}"
-                                text += "\n"
+        parent = self.parent()
+        if not (parent and hasattr(parent, "update_text")):
+            return  # Nobody to show the text to
+        
+        # Only actions changed since the last call are rebuilt; nodes no longer in the scene drop out of the cache
+        cache = {}
+        for node in self.nodes():
+            if node.node_type == "action":
+                text = self._node_text_cache.get(node)
+                cache[node] = self._action_text(node) if text is None else text
+        self._node_text_cache = cache
         
         # Update the text editor
-        if self.parent() and hasattr(self.parent(), "update_text"):
-            self.parent().update_text(text)
+        parent.update_text("".join(cache.values()))
 
 class GraphView(QGraphicsView):
     def __init__(self, parent=None):
         super().__init__(parent)
+        if opengl_available():
+            # Rasterize the scene on the GPU; a GL viewport is always repainted as a whole
+            self.setViewport(QOpenGLWidget())
+            self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        else:
+            # Repaint only the dirty rects; items report their full painted area in boundingRect()
+            self.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
         self.setScene(GraphScene(self))
-        self.setRenderHint(QPainter.Antialiasing)
-        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        # Items turn antialiasing on for themselves where their shapes need it. Their bounding rects already
+        # cover the full painted area, and every paint() sets the painter state it relies on, so the view can
+        # skip padding exposed rects and saving/restoring the painter around each item
+        self.setOptimizationFlags(QGraphicsView.DontAdjustForAntialiasing | QGraphicsView.DontSavePainterState)
+        # The background (brush and grid) only changes with the grid, so pan and zoom blit it from a pixmap;
+        # items are cached individually (DeviceCoordinateCache)
+        self.setCacheMode(QGraphicsView.CacheBackground)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.setDragMode(QGraphicsView.RubberBandDrag)
@@ -638,8 +1178,8 @@ class GraphView(QGraphicsView):
         self.setDragMode(QGraphicsView.RubberBandDrag)
         self.setInteractive(True)
         
-        # Set light gray background
-        self.setBackgroundBrush(QBrush(QColor("#F5F5F5")))
+        # Set light gray background; on the scene, since a view brush would bypass the scene's grid drawing
+        self.scene().setBackgroundBrush(QBrush(QColor("#F5F5F5")))
         
         # Set a reasonable view rect
         self.setSceneRect(-400, -300, 800, 600)
@@ -688,35 +1228,13 @@ class GraphView(QGraphicsView):
             event.acceptProposedAction()
             
             # Update query text
-            if isinstance(self.parent(), VisualQueryBuilder):
-                self.parent().update_query_text()
+            builder = self.scene().builder
+            if builder:
+                builder.update_query_text()
     
     def get_node_type(self, text):
         """Determine the node type based on text content"""
-        # Statement types
-        if text == "initially":
-            return "initial"
-        elif text in ["causes", "always", "impossible"]:
-            return "statement"
-        # Action types
-        elif text in ["executable", "accessible", "realisable", "active"]:
-            return "action"
-        # Effect types
-        elif text in ["always", "sometimes", "not"]:
-            return "effect"
-        # Condition types
-        elif text in ["if", "by", "in", "from"]:
-            return "condition"
-        # Check for negated forms
-        elif text.startswith("not "):
-            base_text = text[4:]  # Remove "not " prefix
-            base_type = self.get_node_type(base_text)
-            if base_type == "initial":
-                return "impossible_initial"
-            return f"impossible_{base_type}" if base_type != "statement" else "statement"
-        # Default to condition for other text
-        else:
-            return "condition"
+        return node_type_for(text)
 
 class VisualQueryBuilder(QWidget):
     def __init__(self, parent=None):
@@ -741,52 +1259,17 @@ class VisualQueryBuilder(QWidget):
         
         for btn in [self.causes_btn, self.always_btn, self.impossible_btn, self.initially_btn]:
             btn.setFixedSize(120, 40)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #5F0F40;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                }
-                QPushButton:hover {
-                    background-color: #7F1F50;
-                }
-            """)
+            btn.setProperty("role", "statement")
             statement_types_layout.addWidget(btn)
         
         # Special style for initially button
-        self.initially_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                border-radius: 6px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
+        self.initially_btn.setProperty("role", "initial")
         
         statement_types.setLayout(statement_types_layout)
         
         # Add clear button
         self.clear_btn = QPushButton("Clear Canvas")
-        self.clear_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #d42828;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 6px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #e83838;
-            }
-            QPushButton:pressed {
-                background-color: #c41818;
-            }
-        """)
+        self.clear_btn.setProperty("role", "clear")
         self.clear_btn.clicked.connect(self.clear_canvas)
         
         # Query type buttons
@@ -799,17 +1282,7 @@ class VisualQueryBuilder(QWidget):
         
         for btn in [self.executable_btn, self.accessible_btn, self.realisable_btn, self.active_btn]:
             btn.setFixedSize(120, 40)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #9A031E;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                }
-                QPushButton:hover {
-                    background-color: #BA233E;
-                }
-            """)
+            btn.setProperty("role", "querytype")
             query_types_layout.addWidget(btn)
         
         query_types.setLayout(query_types_layout)
@@ -822,17 +1295,7 @@ class VisualQueryBuilder(QWidget):
         
         for btn in [self.sometimes_btn, self.not_btn]:
             btn.setFixedSize(120, 40)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #CB793A;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                }
-                QPushButton:hover {
-                    background-color: #DB894A;
-                }
-            """)
+            btn.setProperty("role", "modifier")
             modifiers_layout.addWidget(btn)
         
         modifiers.setLayout(modifiers_layout)
@@ -847,21 +1310,19 @@ class VisualQueryBuilder(QWidget):
         
         for btn in [self.if_btn, self.by_btn, self.from_btn, self.in_btn]:
             btn.setFixedSize(120, 40)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #FCDC4D;
-                    color: black;
-                    border: none;
-                    border-radius: 6px;
-                }
-                QPushButton:hover {
-                    background-color: #FFEC5D;
-                }
-            """)
+            btn.setProperty("role", "connector")
             connectors_layout.addWidget(btn)
         
         connectors.setLayout(connectors_layout)
         
+        # Buttons that are dragged onto the canvas or clicked to add a node
+        self._toolbox_buttons = (
+            self.causes_btn, self.always_btn, self.impossible_btn,
+            self.executable_btn, self.accessible_btn, self.realisable_btn, self.active_btn,
+            self.sometimes_btn, self.not_btn,
+            self.if_btn, self.by_btn, self.from_btn, self.in_btn,
+        )
+        
         # Variable input
         variables = QGroupBox("Variables")
         variables_layout = QVBoxLayout()
@@ -869,8 +1330,7 @@ class VisualQueryBuilder(QWidget):
         # Action variable
         action_layout = QHBoxLayout()
         action_layout.addWidget(QLabel("Action:"))
-        self.action_input = QTextEdit()
-        self.action_input.setMaximumHeight(40)
+        self.action_input = QLineEdit()
         self.action_input.setPlaceholderText("Enter action name")
         action_layout.addWidget(self.action_input)
         self.add_action_btn = QPushButton("Add")
@@ -881,8 +1341,7 @@ class VisualQueryBuilder(QWidget):
         # Effect variable
         effect_layout = QHBoxLayout()
         effect_layout.addWidget(QLabel("Effect:"))
-        self.effect_input = QTextEdit()
-        self.effect_input.setMaximumHeight(40)
+        self.effect_input = QLineEdit()
         self.effect_input.setPlaceholderText("Enter effect name")
         effect_layout.addWidget(self.effect_input)
         self.add_effect_btn = QPushButton("Add")
@@ -893,8 +1352,7 @@ class VisualQueryBuilder(QWidget):
         # Condition variable
         condition_layout = QHBoxLayout()
         condition_layout.addWidget(QLabel("Condition:"))
-        self.condition_input = QTextEdit()
-        self.condition_input.setMaximumHeight(40)
+        self.condition_input = QLineEdit()
         self.condition_input.setPlaceholderText("Enter condition")
         condition_layout.addWidget(self.condition_input)
         self.add_condition_btn = QPushButton("Add")
@@ -921,6 +1379,14 @@ class VisualQueryBuilder(QWidget):
         
         # Create canvas for building queries
         self.canvas = GraphView()
+        self.canvas.scene().builder = self
+        # Row Y positions -> that row's query line, reused until the scene reports the row changed
+        self._line_text_cache = {}
+        # Edits only schedule a text update; the timer applies a burst of them once per frame (~60 Hz)
+        self._query_text_timer = QTimer(self)
+        self._query_text_timer.setSingleShot(True)
+        self._query_text_timer.setInterval(16)
+        self._query_text_timer.timeout.connect(self._flush_query_text)
         self.canvas.setMinimumHeight(400)
         self.canvas.setAcceptDrops(True)
         
@@ -932,19 +1398,7 @@ class VisualQueryBuilder(QWidget):
         
         # Add execute button
         self.execute_btn = QPushButton("Execute Query")
-        self.execute_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #0078d4;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 6px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #1084d8;
-            }
-        """)
+        self.execute_btn.setProperty("role", "execute")
         
         # Add components to main layout
         layout.addWidget(toolbox)
@@ -954,10 +1408,7 @@ class VisualQueryBuilder(QWidget):
         layout.addWidget(self.execute_btn)
         
         # Connect signals
-        for btn in [self.causes_btn, self.always_btn, self.impossible_btn,
-                   self.executable_btn, self.accessible_btn, self.realisable_btn, self.active_btn,
-                   self.sometimes_btn, self.not_btn,
-                   self.if_btn, self.by_btn, self.from_btn, self.in_btn]:
+        for btn in self._toolbox_buttons:
             btn.clicked.connect(self.add_element)
         
         self.execute_btn.clicked.connect(self.execute_query)
@@ -973,9 +1424,8 @@ class VisualQueryBuilder(QWidget):
             
         # For toolbox items, position them in the toolbox area
         if node.is_toolbox_item:
-            items = [item for item in scene.items() if isinstance(item, GraphNode) and item.is_toolbox_item]
-            if items:
-                last_item = items[-1]
+            last_item = scene.bottom_toolbox_node()
+            if last_item is not None:
                 node.setPos(last_item.pos() + QPointF(150, 0))
             else:
                 node.setPos(-350, -250)  # Top-left corner of toolbox area
@@ -988,11 +1438,7 @@ class VisualQueryBuilder(QWidget):
                 line_y = -100  # Default Y position if no guide lines
             
             # Find all nodes on this line
-            nodes_on_line = []
-            for item in scene.items():
-                if isinstance(item, GraphNode) and not item.is_toolbox_item:
-                    if abs(item.pos().y() - line_y) < 5:  # Same line tolerance
-                        nodes_on_line.append(item)
+            nodes_on_line = scene.nodes_near_y(line_y, 5)  # Same line tolerance
             
             # Position the new node
             if nodes_on_line:
@@ -1009,7 +1455,7 @@ class VisualQueryBuilder(QWidget):
     def add_variable(self, var_type):
         """Add a variable node from input"""
         input_widget = getattr(self, f"{var_type}_input")
-        text = input_widget.toPlainText().strip()
+        text = input_widget.text().strip()
         if text:
             # Create node with appropriate type
             if var_type == "action":
@@ -1037,12 +1483,17 @@ class VisualQueryBuilder(QWidget):
     def setup_drag_drop(self):
         """Set up drag and drop functionality"""
         self.setAcceptDrops(True)
-        for btn in [self.causes_btn, self.always_btn, self.impossible_btn,
-                   self.executable_btn, self.accessible_btn, self.realisable_btn, self.active_btn,
-                   self.sometimes_btn, self.not_btn,
-                   self.if_btn, self.by_btn, self.from_btn, self.in_btn]:
+        for btn in self._toolbox_buttons:
             btn.setMouseTracking(True)
-            btn.mousePressEvent = lambda e, b=btn: self.button_press(e, b)
+            # Presses are handled by eventFilter, which starts a drag instead of letting the button see them
+            btn.installEventFilter(self)
+    
+    def eventFilter(self, obj, event):
+        # Only the drag-and-drop toolbox buttons are filtered (see setup_drag_drop)
+        if event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonDblClick):
+            self.button_press(event, obj)
+            return True
+        return super().eventFilter(obj, event)
     
     def button_press(self, event, button):
         """Handle button press for drag and drop"""
@@ -1070,124 +1521,81 @@ class VisualQueryBuilder(QWidget):
     
     def get_node_type(self, text):
         """Determine the node type based on text content"""
-        # Statement types
-        if text == "initially":
-            return "initial"
-        elif text in ["causes", "always", "impossible"]:
-            return "statement"
-        # Action types
-        elif text in ["executable", "accessible", "realisable", "active"]:
-            return "action"
-        # Effect types
-        elif text in ["always", "sometimes", "not"]:
-            return "effect"
-        # Condition types
-        elif text in ["if", "by", "in", "from"]:
-            return "condition"
-        # Check for negated forms
-        elif text.startswith("not "):
-            base_text = text[4:]  # Remove "not " prefix
-            base_type = self.get_node_type(base_text)
-            if base_type == "initial":
-                return "impossible_initial"
-            return f"impossible_{base_type}" if base_type != "statement" else "statement"
-        # Default to condition for other text
-        else:
-            return "condition"
+        return node_type_for(text)
     
     def update_query_text(self):
+        """Schedule converting the graph to text, so several edits in a row re-layout the text box once"""
+        if not self._query_text_timer.isActive():
+            self._query_text_timer.start()
+    
+    def _flush_query_text(self):
         """Convert graph to text representation"""
+        self._query_text_timer.stop()
         scene = self.canvas.scene()
         if not scene:
             return
             
-        # Get all non-toolbox nodes
-        nodes = [item for item in scene.items() if isinstance(item, GraphNode)]
-        
-        # Group nodes by their Y position (with some tolerance)
-        lines = {}
+        # Group nodes by their Y position (with some tolerance); only rows the scene reports as changed are reformatted
         tolerance = 5  # pixels tolerance for grouping
+        dirty_ys = scene.take_dirty_ys()
         
-        for node in nodes:
-            # Skip toolbox template items but include user-added variables
-            if node.is_toolbox_item:
-                continue
-                
-            y_pos = node.pos().y()
-            # Find the closest existing line
-            matched = False
-            for line_y in lines.keys():
-                if abs(line_y - y_pos) <= tolerance:
-                    lines[line_y].append(node)
-                    matched = True
-                    break
-            if not matched:
-                lines[y_pos] = [node]
-        
-        # Sort nodes in each line by x position
-        for line_nodes in lines.values():
-            line_nodes.sort(key=lambda node: node.pos().x())
-        
-        # Convert lines to query text
-        query_parts = []
-        
-        # Process lines from top to bottom
-        for y in sorted(lines.keys()):
-            line_nodes = lines[y]
-            if not line_nodes:
-                continue
-            
-            # Build statement from the line's nodes
-            line_parts = []
-            for node in line_nodes:
-                if node.node_type == "initial" or node.node_type == "impossible_initial":
-                    # Handle initial state declarations
-                    if not line_parts:
-                        line_parts.append("initially")
-                    text = "not " + node.text if node.node_type == "impossible_initial" else node.text
-                    if len(line_parts) > 1:
-                        line_parts.append(",")
-                    line_parts.append(text)
-                else:
-                    line_parts.append(node.text)
-            
-            if line_parts:
-                # Special formatting for query types
-                if line_parts[0] in ["executable", "accessible", "realisable", "active"]:
-                    query_type = line_parts[0]
-                    remaining_parts = line_parts[1:]
-                    
-                    if query_type == "executable":
-                        query_parts.append(f"{query_type} {'; '.join(remaining_parts)}")
-                    elif query_type == "accessible":
-                        if "from" in remaining_parts:
-                            from_idx = remaining_parts.index("from")
-                            target = remaining_parts[:from_idx]
-                            conditions = remaining_parts[from_idx + 1:]
-                            query_parts.append(f"{query_type} {' '.join(target)} from {' '.join(conditions)}")
-                        else:
-                            query_parts.append(f"{query_type} {' '.join(remaining_parts)}")
-                    elif query_type in ["realisable", "active"]:
-                        if "by" in remaining_parts:
-                            by_idx = remaining_parts.index("by")
-                            actions = remaining_parts[:by_idx]
-                            agents = remaining_parts[by_idx + 1:]
-                            if query_type == "realisable":
-                                query_parts.append(f"{query_type} {'; '.join(actions)} by {', '.join(agents)}")
-                            else:
-                                query_parts.append(f"{query_type} {' '.join(actions)} by {', '.join(agents)}")
-                        else:
-                            query_parts.append(f"{query_type} {' '.join(remaining_parts)}")
-                else:
-                    # Regular statement (causes, impossible, initially, etc.)
-                    query_parts.append(" ".join(line_parts))
+        # Convert lines to query text, from top to bottom
+        line_texts = {}
+        for ys in scene.row_ys(tolerance):
+            text = self._line_text_cache.get(ys)
+            if text is None or not dirty_ys.isdisjoint(ys):
+                text = self._format_line(scene.row_nodes(ys))
+            line_texts[ys] = text
+        self._line_text_cache = line_texts
         
         # Join all parts with newlines
-        query = "\n".join(query_parts)
+        query = "\n".join(line_texts.values())
         self.query_text.setText(query)
     
+    @staticmethod
+    def _format_line(line_nodes):
+        """Query or statement text of one line of nodes sorted by X position"""
+        # Build statement from the line's nodes, noting where the first "from" and "by" land
+        line_parts = []
+        from_idx = by_idx = None
+        for node in line_nodes:
+            if node.node_type == "initial" or node.node_type == "impossible_initial":
+                # Handle initial state declarations
+                if not line_parts:
+                    line_parts.append("initially")
+                text = "not " + node.text if node.node_type == "impossible_initial" else node.text
+                if len(line_parts) > 1:
+                    line_parts.append(",")
+            else:
+                text = node.text
+            if text == "from" and from_idx is None:
+                from_idx = len(line_parts)
+            elif text == "by" and by_idx is None:
+                by_idx = len(line_parts)
+            line_parts.append(text)
+        
+        # Special formatting for query types
+        query_type = line_parts[0]
+        if query_type == "executable":
+            return f"{query_type} {'; '.join(line_parts[1:])}"
+        if query_type == "accessible" and from_idx is not None:
+            target = " ".join(line_parts[1:from_idx])
+            conditions = " ".join(line_parts[from_idx + 1:])
+            return f"{query_type} {target} from {conditions}"
+        if query_type in ("realisable", "active") and by_idx is not None:
+            separator = "; " if query_type == "realisable" else " "
+            actions = separator.join(line_parts[1:by_idx])
+            agents = ", ".join(line_parts[by_idx + 1:])
+            return f"{query_type} {actions} by {agents}"
+        if query_type in ("accessible", "realisable", "active"):
+            return f"{query_type} {' '.join(line_parts[1:])}"
+        # Regular statement (causes, impossible, initially, etc.)
+        return " ".join(line_parts)
+    
     def execute_query(self):
         """Execute the current query"""
+        if self._query_text_timer.isActive():
+            self._flush_query_text()  # Run what is on the canvas, not the text from before the last edit
         query = self.query_text.toPlainText()
         if query:
             # Get the main window instance
@@ -1197,113 +1605,47 @@ class VisualQueryBuilder(QWidget):
     
     def update_domain_elements(self, domain_text):
         """Update available domain elements"""
-        # Clear existing elements
-        for i in reversed(range(self.domain_elements_layout.count())):
-            widget = self.domain_elements_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-        
         # Parse domain text to extract actions and conditions
-        actions = set()
-        conditions = set()
-        
-        for line in domain_text.split('\n'):
-            if not line.strip():
-                continue
-            
-            parts = line.split()
-            if not parts:
-                continue
-            
-            if parts[0] == "causes":
-                # Extract action
-                action = parts[1]
-                if "(" in action:
-                    action = action[:action.index("(")]
-                actions.add(action)
-                
-                # Extract effect
-                effect = parts[2]
-                conditions.add(effect)
-                
-                # Extract conditions after "if"
-                try:
-                    if_idx = parts.index("if")
-                    conditions_part = " ".join(parts[if_idx + 1:])
-                    for cond in conditions_part.split(","):
-                        cond = cond.strip()
-                        if cond.startswith("not "):
-                            cond = cond[4:]
-                        conditions.add(cond)
-                except ValueError:
-                    # No "if" found, continue without conditions
-                    pass
-            
-            elif parts[0] == "impossible":
-                # Extract action
-                action = parts[1]
-                if "(" in action:
-                    action = action[:action.index("(")]
-                actions.add(action)
-                
-                # Extract conditions after "if"
-                try:
-                    if_idx = parts.index("if")
-                    conditions_part = " ".join(parts[if_idx + 1:])
-                    for cond in conditions_part.split(","):
-                        cond = cond.strip()
-                        if cond.startswith("not "):
-                            cond = cond[4:]
-                        conditions.add(cond)
-                except ValueError:
-                    # No "if" found, continue without conditions
-                    pass
+        actions, conditions = domain_elements(domain_text)
         
-        # Create buttons for actions
+        # Build the new groups off-screen; their buttons are laid out once, when the group is shown
+        groups = []
         if actions:
-            actions_group = QGroupBox("Actions")
-            actions_layout = QVBoxLayout()
-            for action in sorted(actions):
-                btn = QPushButton(action)
-                btn.setFixedSize(120, 40)
-                btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #9A031E;
-                        color: white;
-                        border: none;
-                        border-radius: 6px;
-                    }
-                    QPushButton:hover {
-                        background-color: #BA233E;
-                    }
-                """)
-                btn.clicked.connect(lambda checked, a=action: self.add_domain_element(a, "action"))
-                actions_layout.addWidget(btn)
-            actions_group.setLayout(actions_layout)
-            self.domain_elements_layout.addWidget(actions_group)
-        
-        # Create buttons for conditions
+            groups.append(self._domain_element_group("Actions", actions, "action"))
         if conditions:
-            conditions_group = QGroupBox("Conditions")
-            conditions_layout = QVBoxLayout()
-            for condition in sorted(conditions):
-                btn = QPushButton(condition)
-                btn.setFixedSize(120, 40)
-                btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #FCDC4D;
-                        color: black;
-                        border: none;
-                        border-radius: 6px;
-                    }
-                    QPushButton:hover {
-                        background-color: #FFEC5D;
-                    }
-                """)
-                btn.clicked.connect(lambda checked, c=condition: self.add_domain_element(c, "condition"))
-                conditions_layout.addWidget(btn)
-            conditions_group.setLayout(conditions_layout)
-            self.domain_elements_layout.addWidget(conditions_group)
+            groups.append(self._domain_element_group("Conditions", conditions, "condition"))
+        
+        # Swap them in for the existing elements with repaints suspended, so no half-built toolbox is shown
+        updates_enabled = self.domain_elements.updatesEnabled()
+        self.domain_elements.setUpdatesEnabled(False)
+        try:
+            while self.domain_elements_layout.count():
+                widget = self.domain_elements_layout.takeAt(0).widget()
+                if widget:
+                    widget.hide()
+                    widget.deleteLater()
+            for group in groups:
+                self.domain_elements_layout.addWidget(group)
+        finally:
+            self.domain_elements.setUpdatesEnabled(updates_enabled)
+    
+    def _domain_element_group(self, title, names, element_type):
+        """Group box with one button per domain element, adding that element to the canvas when clicked"""
+        group = QGroupBox(title)
+        group_layout = QVBoxLayout()
+        for name in sorted(names):
+            btn = QPushButton(name)
+            btn.setFixedSize(120, 40)
+            btn.setProperty("role", element_type)
+            btn.clicked.connect(self.domain_element_clicked)
+            group_layout.addWidget(btn)
+        group.setLayout(group_layout)
+        return group
+    
+    def domain_element_clicked(self):
+        """Add the domain element of the clicked button to the canvas"""
+        btn = self.sender()
+        self.add_domain_element(btn.text(), btn.property("role"))
     
     def add_domain_element(self, text, element_type):
         """Add a domain element to the canvas"""
@@ -1319,40 +1661,84 @@ class VisualQueryBuilder(QWidget):
         if not scene:
             return
             
-        # Store guide line coordinates
-        rect = scene.sceneRect()
-        line_positions = scene.line_y_positions[:]
-        
-        # Clear everything
+        # Guide lines are part of the scene background, so clearing the items keeps them
         scene.clear()
         
-        # Reset grid lines lists
-        scene.grid_lines = []
-        scene.line_y_positions = []
-        
-        # Recreate guide lines
-        for y in line_positions:
-            line = QGraphicsLineItem(rect.left(), y, rect.right(), y)
-            line.setPen(QPen(QColor("#A0A0A0"), 1, Qt.DashLine))
-            line.setZValue(-1)
-            scene.addItem(line)
-            scene.grid_lines.append(line)
-            scene.line_y_positions.append(y)
-        
         # Clear query text
         self.query_text.clear()
 
+class SemanticsWorkerSignals(QObject):
+    """Signals of a SemanticsWorker; QRunnable is not a QObject and cannot emit them itself"""
+    finished = pyqtSignal(object, str)  # (result, error message or "" on success)
+
+class SemanticsWorker(QRunnable):
+    """Run a call into the semantics engine on a thread pool and report the result on the GUI thread"""
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = SemanticsWorkerSignals()
+    
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.finished.emit(None, str(e))
+        else:
+            self.signals.finished.emit(result, "")
+
+def run_queries(semantics, queries):
+    """Evaluate queries one by one, turning a failing query into a False result with the error"""
+    results = []
+    for query in queries:
+        logger.debug("Processing query: %s", query)
+        try:
+            results.append(semantics.process_query(query))
+        except Exception as e:
+            logger.debug("Error processing individual query: %s", e)
+            results.append((False, f"Error: {str(e)}"))
+    return results
+
+# One block of the query result pane: (query, result, explanation)
+RESULT_FORMAT = "Query: %s\nResult: %s\nExplanation: %s\n\n"
+
+# Problems offered in the selection box, in display order
+PROBLEM_NAMES = (
+    "Tank Crew Mission",
+    "Football Team",
+    "Rescue Team",
+    "Fire Brigade",
+    "Medical Diagnosis",
+)
+
+# Menu bar layout: (menu title, item labels), None marks a separator
+MENU_SPEC = (
+    ("File", ("New", "Open...", "Save", "Save As...", None, "Exit")),
+    ("Edit", ("Undo", "Redo", None, "Cut", "Copy", "Paste")),
+    ("View", ("State Diagram", "Debug Log")),
+    ("Help", ("Documentation", "About")),
+)
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Multi-Agent Action Programs Analysis System")
         self.setMinimumSize(1200, 800)
         
-        # Initialize semantics engine
+        # Initialize semantics engine (imported here so importing this module stays cheap)
+        from engine.semantics import ActionSemantics
         self.semantics = ActionSemantics()
         
-        # Set the application style for dark mode
-        self.setup_dark_mode()
+        # Problem database, opened on first use and kept open for the window's lifetime
+        self._db = None
+        # (domain_definition, example_queries) by problem name, so switching back skips the query
+        self._problem_cache = {}
+        # Hash of the domain text last sent to the semantics engine
+        self._applied_domain_hash = None
+        # Semantics calls run off the GUI thread; one worker thread keeps them in submission order
+        self._semantics_pool = QThreadPool(self)
+        self._semantics_pool.setMaxThreadCount(1)
+        self._semantics_jobs = []
         
         # Create the main widget and layout
         main_widget = QWidget()
@@ -1366,14 +1752,13 @@ class MainWindow(QMainWindow):
         # Problem selection
         problem_label = QLabel("Select Problem:")
         self.problem_combo = QComboBox()
-        self.problem_combo.addItems([
-            "Tank Crew Mission",
-            "Football Team",
-            "Rescue Team",
-            "Fire Brigade",
-            "Medical Diagnosis"
-        ])
-        self.problem_combo.currentTextChanged.connect(self.load_problem)
+        self.problem_combo.addItems(PROBLEM_NAMES)
+        # Debounce selection changes so scrolling through the list only loads the problem it settles on
+        self._load_timer = QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self._load_timer.setInterval(150)
+        self._load_timer.timeout.connect(lambda: self.load_problem(self.problem_combo.currentText()))
+        self.problem_combo.currentTextChanged.connect(lambda _=None: self._load_timer.start())
         
         # View mode selection
         view_mode_group = QWidget()
@@ -1409,13 +1794,13 @@ class MainWindow(QMainWindow):
         self.domain_graph.hide()
         
         # Add Apply Domain button
-        apply_domain_btn = QPushButton("Apply Domain Definition")
-        apply_domain_btn.clicked.connect(self.apply_domain)
+        self.apply_domain_btn = QPushButton("Apply Domain Definition")
+        self.apply_domain_btn.clicked.connect(self.apply_domain)
         
         domain_layout.addWidget(QLabel("Domain Definition:"))
         domain_layout.addWidget(self.domain_editor)
         domain_layout.addWidget(self.domain_graph)
-        domain_layout.addWidget(apply_domain_btn)
+        domain_layout.addWidget(self.apply_domain_btn)
         
         # Query Tab
         query_tab = QWidget()
@@ -1427,19 +1812,19 @@ class MainWindow(QMainWindow):
         self.query_graph.hide()
         
         # Create text and graph views for results
-        self.query_result = QTextEdit()
+        self.query_result = QPlainTextEdit()
         self.query_result.setReadOnly(True)
         self.result_graph = GraphView()
         self.result_graph.hide()
         
         # Add Execute Query button
-        execute_query_btn = QPushButton("Execute Query")
-        execute_query_btn.clicked.connect(self.execute_query)
+        self.execute_query_btn = QPushButton("Execute Query")
+        self.execute_query_btn.clicked.connect(self.execute_query)
         
         query_layout.addWidget(QLabel("Query:"))
         query_layout.addWidget(self.query_editor)
         query_layout.addWidget(self.query_graph)
-        query_layout.addWidget(execute_query_btn)
+        query_layout.addWidget(self.execute_query_btn)
         query_layout.addWidget(QLabel("Result:"))
         query_layout.addWidget(self.query_result)
         query_layout.addWidget(self.result_graph)
@@ -1459,8 +1844,10 @@ class MainWindow(QMainWindow):
         # Create menu bar
         self.create_menu_bar()
         
-        # Load initial problem
-        self.load_problem(self.problem_combo.currentText())
+        # Load initial problem once the event loop has painted the window
+        QTimer.singleShot(0, lambda: self.load_problem(self.problem_combo.currentText()))
+        # Then fill the problem cache so later selections do not touch the database
+        QTimer.singleShot(100, self._prefetch_problems)
     
     def switch_view_mode(self, button):
         """Switch between text and graph view modes"""
@@ -1561,9 +1948,9 @@ class MainWindow(QMainWindow):
                     scene.addItem(edge)
                 
                 # Add conditions if they exist
-                if "if" in line:
-                    conditions_part = line[line.index("if") + 2:].strip()
-                    conditions = [c.strip() for c in conditions_part.split(",")]
+                split = IF_RE.split(line, maxsplit=1)
+                if len(split) == 2:
+                    conditions = list(map(str.strip, split[1].split(",")))
                     
                     for condition in conditions:
                         condition_type = "condition"
@@ -1816,37 +2203,72 @@ class MainWindow(QMainWindow):
         
         # Arrange nodes
         self.arrange_nodes(scene)
-
+    
     def apply_domain(self):
         """Apply the domain definition"""
         try:
             domain_text = self.domain_editor.toPlainText()
-            print("Applying domain definition:")
-            print(domain_text)
+            logger.debug("Applying domain definition:\n%s", domain_text)
             
             # Update visual query builder with domain elements
             self.visual_query_tab.update_domain_elements(domain_text)
             
-            # Send domain text directly to semantics engine
-            self.semantics.process_domain_definition(domain_text)
-            
-            # Update graph view if active
-            if self.graph_mode_radio.isChecked():
-                self.domain_graph.scene().clear()
-                self.update_domain_graph()
-            
-            QMessageBox.information(self, "Success", "Domain definition applied successfully!")
+            # Send the encoded text to the semantics engine, which hashes it as is, unless it was already applied
+            domain_data = domain_text.encode('utf-8')
+            domain_hash = hash(domain_data)
+            if domain_hash == self._applied_domain_hash:
+                self.domain_applied(domain_hash, None, "")
+            else:
+                self.run_semantics(
+                    lambda result, error: self.domain_applied(domain_hash, result, error),
+                    self.semantics.process_domain_definition_bytes, domain_data
+                )
             
         except Exception as e:
-            print(f"Error in domain definition: {str(e)}")
+            logger.debug("Error in domain definition: %s", e)
             QMessageBox.critical(self, "Error", f"Error in domain definition: {str(e)}")
     
+    def domain_applied(self, domain_hash, result, error):
+        """Finish apply_domain once the semantics engine has processed the definition"""
+        if error:
+            self._applied_domain_hash = None
+            logger.debug("Error in domain definition: %s", error)
+            QMessageBox.critical(self, "Error", f"Error in domain definition: {error}")
+            return
+        self._applied_domain_hash = domain_hash
+        
+        # Update graph view if active
+        if self.graph_mode_radio.isChecked():
+            self.domain_graph.scene().clear()
+            self.update_domain_graph()
+        
+        QMessageBox.information(self, "Success", "Domain definition applied successfully!")
+    
+    def run_semantics(self, on_finished, fn, *args):
+        """Run fn(*args) on the semantics thread and pass (result, error) to on_finished"""
+        worker = SemanticsWorker(fn, *args)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.finished.connect(lambda *_: self._semantics_job_done(worker))
+        # Keep the worker alive until it has reported back
+        self._semantics_jobs.append(worker)
+        self.set_semantics_busy(True)
+        self._semantics_pool.start(worker)
+    
+    def _semantics_job_done(self, worker):
+        self._semantics_jobs.remove(worker)
+        if not self._semantics_jobs:
+            self.set_semantics_busy(False)
+    
+    def set_semantics_busy(self, busy):
+        """Disable the buttons that start semantics jobs while one is in flight"""
+        self.apply_domain_btn.setEnabled(not busy)
+        self.execute_query_btn.setEnabled(not busy)
+    
     def execute_query(self):
         """Execute the current query"""
         try:
             query_text = self.query_editor.toPlainText()
-            print("Executing query:")
-            print(query_text)
+            logger.debug("Executing query:\n%s", query_text)
             
             # Pre-process queries
             processed_queries = []
@@ -1875,245 +2297,136 @@ class MainWindow(QMainWindow):
                     processed_queries.append(line)
             
             # Process each query separately
-            results = []
-            explanations = []
-            
-            for query in processed_queries:
-                if not query.strip():
-                    continue
-                    
-                print(f"Processing query: {query}")
-                try:
-                    result, explanation = self.semantics.process_query(query)
-                    results.append(result)
-                    explanations.append(explanation)
-                except Exception as e:
-                    print(f"Error processing individual query: {str(e)}")
-                    results.append(False)
-                    explanations.append(f"Error: {str(e)}")
-            
-            # Combine results
-            if results:
-                combined_result = "Results:\n"
-                for i, (result, explanation) in enumerate(zip(results, explanations)):
-                    original_query = query_text.split('\n')[i].strip()
-                    combined_result += f"Query: {original_query}\n"
-                    combined_result += f"Result: {result}\n"
-                    combined_result += f"Explanation: {explanation}\n\n"
-                
-                self.query_result.setText(combined_result)
-                
-                # Update graph view if active
-                if self.graph_mode_radio.isChecked():
-                    self.query_graph.scene().clear()
-                    self.update_query_graph()
-                    self.result_graph.scene().clear()
-                    self.update_result_graph()
+            queries = [query for query in processed_queries if query.strip()]
+            self.run_semantics(
+                lambda results, error: self.queries_executed(query_text, results, error),
+                run_queries, self.semantics, queries
+            )
             
         except Exception as e:
-            print(f"Error in query: {str(e)}")
-            self.query_result.setText(f"Error: {str(e)}")
+            logger.debug("Error in query: %s", e)
+            self.query_result.setPlainText(f"Error: {str(e)}")
             QMessageBox.critical(self, "Error", f"Error in query: {str(e)}")
     
+    def queries_executed(self, query_text, results, error):
+        """Show the (result, explanation) pairs of execute_query once the semantics engine is done"""
+        if error:
+            logger.debug("Error in query: %s", error)
+            self.query_result.setPlainText(f"Error: {error}")
+            QMessageBox.critical(self, "Error", f"Error in query: {error}")
+            return
+        
+        # Combine results
+        if results:
+            lines = query_text.split('\n')
+            self.query_result.setPlainText("Results:\n" + "".join(
+                RESULT_FORMAT % (lines[i].strip(), result, explanation)
+                for i, (result, explanation) in enumerate(results)
+            ))
+            
+            # Update graph view if active
+            if self.graph_mode_radio.isChecked():
+                self.query_graph.scene().clear()
+                self.update_query_graph()
+                self.result_graph.scene().clear()
+                self.update_result_graph()
+    
     def load_problem(self, problem_name):
         """Load a problem from the database"""
         try:
-            from db.database import DatabaseManager
-            db = DatabaseManager()
-            problem = db.get_problem_by_name(problem_name)
+            problem = self._fetch_problem(problem_name)
             if problem:
-                print(f"Loading problem: {problem_name}")
-                print("Domain definition:")
-                print(problem['domain_definition'])
-                print("Example queries:")
-                print(problem['example_queries'])
-                self.domain_editor.setText(problem['domain_definition'])
-                self.query_editor.setText(problem['example_queries'])
+                domain_definition, example_queries = problem
+                logger.debug(
+                    "Loading problem: %s\nDomain definition:\n%s\nExample queries:\n%s",
+                    problem_name, domain_definition, example_queries
+                )
+                with bulk_edit(self.domain_editor):
+                    self.domain_editor.setPlainText(domain_definition)
+                with bulk_edit(self.query_editor):
+                    self.query_editor.setPlainText(example_queries)
                 # Automatically apply the domain definition
                 self.apply_domain()
             else:
-                print(f"Problem not found: {problem_name}")
+                logger.warning("Problem not found: %s", problem_name)
         except Exception as e:
-            print(f"Error loading problem: {str(e)}")
+            logger.debug("Error loading problem: %s", e)
             QMessageBox.warning(self, "Warning", f"Could not load problem: {str(e)}")
     
-    def setup_dark_mode(self):
-        """Set up dark mode styling"""
-        # Set fusion style for better dark mode support
-        QApplication.setStyle(QStyleFactory.create('Fusion'))
-        
-        # Create dark palette
-        dark_palette = QPalette()
-        
-        # Dark mode colors
-        dark_color = QColor(45, 45, 45)
-        disabled_color = QColor(127, 127, 127)
-        text_color = QColor(255, 255, 255)
-        highlight_color = QColor(42, 130, 218)
-        dark_text = QColor(210, 210, 210)
-        
-        # Set colors for different color roles
-        dark_palette.setColor(QPalette.Window, dark_color)
-        dark_palette.setColor(QPalette.WindowText, text_color)
-        dark_palette.setColor(QPalette.Base, QColor(18, 18, 18))
-        dark_palette.setColor(QPalette.AlternateBase, dark_color)
-        dark_palette.setColor(QPalette.ToolTipBase, text_color)
-        dark_palette.setColor(QPalette.ToolTipText, text_color)
-        dark_palette.setColor(QPalette.Text, text_color)
-        dark_palette.setColor(QPalette.Disabled, QPalette.Text, disabled_color)
-        dark_palette.setColor(QPalette.Button, dark_color)
-        dark_palette.setColor(QPalette.ButtonText, text_color)
-        dark_palette.setColor(QPalette.Disabled, QPalette.ButtonText, disabled_color)
-        dark_palette.setColor(QPalette.BrightText, Qt.red)
-        dark_palette.setColor(QPalette.Link, highlight_color)
-        dark_palette.setColor(QPalette.Highlight, highlight_color)
-        dark_palette.setColor(QPalette.HighlightedText, Qt.black)
-        
-        # Apply the palette
-        QApplication.setPalette(dark_palette)
-        
-        # Set stylesheet for custom styling
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #2d2d2d;
-            }
-            QTextEdit {
-                background-color: #1e1e1e;
-                color: #ffffff;
-                border: 1px solid #3d3d3d;
-                border-radius: 4px;
-                padding: 5px;
-                font-family: 'Menlo', 'Monaco', 'Courier New', monospace;
-                font-size: 13px;
-            }
-            QLabel {
-                color: #ffffff;
-                font-weight: bold;
-                font-family: 'SF Pro Text', system-ui;
-                font-size: 13px;
-            }
-            QPushButton {
-                background-color: #0078d4;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 6px;
-                font-family: 'SF Pro Text', system-ui;
-            }
-            QPushButton:hover {
-                background-color: #1084d8;
-            }
-            QPushButton:pressed {
-                background-color: #006cbd;
-            }
-            QComboBox {
-                background-color: #1e1e1e;
-                color: white;
-                padding: 5px;
-                border: 1px solid #3d3d3d;
-                border-radius: 6px;
-                font-family: -apple-system, 'SF Pro Text';
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-            QComboBox::down-arrow {
-                image: none;
-                border: none;
-            }
-            QTabWidget::pane {
-                border: 1px solid #3d3d3d;
-                border-radius: 6px;
-            }
-            QTabBar::tab {
-                background-color: #2d2d2d;
-                color: #ffffff;
-                padding: 8px 16px;
-                margin-right: 2px;
-                border-top-left-radius: 6px;
-                border-top-right-radius: 6px;
-            }
-            QTabBar::tab:selected {
-                background-color: #1e1e1e;
-            }
-            QMenuBar {
-                background-color: #2d2d2d;
-                color: white;
-            }
-            QMenuBar::item {
-                background-color: transparent;
-                padding: 4px 10px;
-            }
-            QMenuBar::item:selected {
-                background-color: #3d3d3d;
-                border-radius: 4px;
-            }
-            QMenu {
-                background-color: #2d2d2d;
-                color: white;
-                border: 1px solid #3d3d3d;
-                border-radius: 6px;
-                padding: 4px;
-            }
-            QMenu::item {
-                padding: 4px 20px;
-                border-radius: 4px;
-            }
-            QMenu::item:selected {
-                background-color: #3d3d3d;
-            }
-            QMenu::separator {
-                height: 1px;
-                background-color: #3d3d3d;
-                margin: 4px 0px;
-            }
-        """)
+    def database(self):
+        """Return the problem database, opening it on first use"""
+        if self._db is None:
+            from db.database import DatabaseManager
+            self._db = DatabaseManager()
+        return self._db
+    
+    def _fetch_problem(self, problem_name):
+        """Fetch (domain_definition, example_queries) of a problem, or None if it does not exist"""
+        if problem_name not in self._problem_cache:
+            problem = self.database().get_problem_by_name(problem_name)
+            self._problem_cache[problem_name] = (
+                None if problem is None else (problem['domain_definition'], problem['example_queries'])
+            )
+        return self._problem_cache[problem_name]
+    
+    def _prefetch_problems(self):
+        """Load every listed problem into the cache with a single query"""
+        try:
+            problems = self.database().get_problems_by_names(PROBLEM_NAMES)
+            for name in PROBLEM_NAMES:
+                problem = problems.get(name)
+                self._problem_cache.setdefault(
+                    name, None if problem is None else (problem['domain_definition'], problem['example_queries'])
+                )
+        except Exception as e:
+            logger.debug("Error prefetching problems: %s", e)
+    
+    def closeEvent(self, event):
+        """Wait for pending semantics jobs and close the database connection together with the window"""
+        self._semantics_pool.waitForDone()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        super().closeEvent(event)
     
     def create_menu_bar(self):
         """Create the application menu bar"""
         menubar = self.menuBar()
         
-        # File menu
-        file_menu = menubar.addMenu("File")
-        file_menu.addAction("New")
-        file_menu.addAction("Open...")
-        file_menu.addAction("Save")
-        file_menu.addAction("Save As...")
-        file_menu.addSeparator()
-        file_menu.addAction("Exit")
-        
-        # Edit menu
-        edit_menu = menubar.addMenu("Edit")
-        edit_menu.addAction("Undo")
-        edit_menu.addAction("Redo")
-        edit_menu.addSeparator()
-        edit_menu.addAction("Cut")
-        edit_menu.addAction("Copy")
-        edit_menu.addAction("Paste")
-        
-        # View menu
-        view_menu = menubar.addMenu("View")
-        view_menu.addAction("State Diagram")
-        view_menu.addAction("Debug Log")
-        
-        # Help menu
-        help_menu = menubar.addMenu("Help")
-        help_menu.addAction("Documentation")
-        help_menu.addAction("About")
-
+        for menu_name, items in MENU_SPEC:
+            menu = menubar.addMenu(menu_name)
+            for label in items:
+                if label is None:
+                    menu.addSeparator()
+                else:
+                    menu.addAction(label)
+    
     def execute_query_text(self, query_text):
         """Execute a query from text (used by visual query builder)"""
-        self.query_editor.setText(query_text)
+        self.query_editor.setPlainText(query_text)
         self.execute_query()
 
 if __name__ == '__main__':
-    # Enable High DPI scaling
+    # Enable High DPI scaling; Qt only honours these attributes before the QApplication is created
     if hasattr(Qt, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
         QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     
+    # Multisampling for the OpenGL graph viewports
+    surface_format = QSurfaceFormat()
+    surface_format.setSamples(4)
+    QSurfaceFormat.setDefaultFormat(surface_format)
+    
+    # Debug output (domain and query text) is opt-in via RW_DEBUG=1
+    logging.basicConfig(level=logging.DEBUG if os.environ.get("RW_DEBUG") == "1" else logging.INFO)
+    
     app = QApplication(sys.argv)
+    QPixmapCache.setCacheLimit(ITEM_PIXMAP_CACHE_KB)
+    # Dark theme is installed once for the whole application
+    app.setStyle(QStyleFactory.create('Fusion'))
+    app.setPalette(_make_dark_palette())
+    app.setStyleSheet(DARK_STYLESHEET)
     
     window = MainWindow()
     window.show()
@@ -1,7 +1,9 @@
+import copy
+import sys
 import pytest
-from engine.parser import ActionParser
+from engine.parser import ActionParser, KIND_CAUSES, KIND_IMPOSSIBLE
 from engine.executor import ActionExecutor, State
-from engine.semantics import ActionSemantics
+from engine.semantics import ActionSemantics, action_name, compile_query
 
 def test_parser():
     parser = ActionParser()
@@ -29,6 +31,59 @@ def test_parser():
     assert "executable" in query
     assert len(query.program) == 2
 
+def test_parser_statement_cache():
+    parser = ActionParser()
+    
+    first = parser.parse_statement("causes move(driver) position_changed if engine_on")
+    first["type"] = "mutated"
+    second = parser.parse_statement("causes move(driver) position_changed if engine_on")
+    assert second["type"] == "causes"
+    assert second["conditions"] == (("engine_on",),)
+    
+    info = parser.statement_cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+
+def test_parser_matches_grammar():
+    parser = ActionParser()
+    
+    statements = [
+        "causes fire(gunner, driver) target_destroyed if target_locked, not ammunition_loaded",
+        "causes stop_engine(driver) not engine_on",
+        "impossible move(driver) if not engine_on",
+        "impossible wait",
+        "always not target_locked",
+        "initially engine_on, not target_locked",
+        "releases spin(turret) heading",
+    ]
+    for text in statements:
+        assert parser.parse_statement(text) == parser._parse_with_grammar(text)
+    
+    with pytest.raises(ValueError):
+        parser.parse_statement("causes move(driver)")
+    
+    # The fast path's internal exception is not chained onto the reported error
+    with pytest.raises(ValueError) as excinfo:
+        parser.parse_statements("causes ??? bad")
+    exc = excinfo.value
+    while exc is not None:
+        assert type(exc).__name__ != "_FastParseError"
+        exc = exc.__context__
+
+def test_parse_statements():
+    parser = ActionParser()
+    
+    statements = parser.parse_statements("""
+    causes start_engine(driver) engine_on
+    
+    impossible move(driver) if not engine_on
+    """)
+    assert [stmt["type"] for stmt in statements] == ["causes", "impossible"]
+    assert statements[1]["conditions"] == (("not", "engine_on"),)
+    assert statements[1]["condition_strs"] == ("not engine_on",)
+    assert statements[0]["effect_str"] == "engine_on"
+    assert [stmt["kind"] for stmt in statements] == [KIND_CAUSES, KIND_IMPOSSIBLE]
+
 def test_executor():
     executor = ActionExecutor()
     
@@ -49,6 +104,142 @@ def test_executor():
     result = executor.execute_action("move", state_no_engine)
     assert result is None
 
+def test_execute_program_matches_execute_action():
+    executor = ActionExecutor()
+    executor.add_causes_rule("start", "engine_on")
+    executor.add_causes_rule("move", "position_changed", ["engine_on"])
+    executor.add_causes_rule("stop", "not engine_on")
+    executor.add_releases_rule("stop", "engine_on")
+    executor.add_impossible_rule("fire", ["position_changed"])
+    executor.add_always_rule("alive")
+    executor.add_always_rule("not damaged")
+    
+    program = ["start", "move", "stop", "move", "unknown"]
+    initial_state = State(fluents={"damaged", "cargo"}, released=set())
+    states = executor.execute_program(program, initial_state)
+    
+    expected = [initial_state]
+    for action in program:
+        expected.append(executor.execute_action(action, expected[-1]))
+    assert states == expected
+    assert "engine_on" not in states[3].fluents
+    assert executor.execute_program(program + ["fire"], initial_state) == []
+
+def test_execute_program_batch():
+    executor = ActionExecutor()
+    executor.add_causes_rule("start", "engine_on", ["fuel"])
+    executor.add_causes_rule("move", "position_changed", ["engine_on"])
+    executor.add_impossible_rule("move", ["stalled"])
+    executor.add_releases_rule("move", "fuel")
+    executor.add_always_rule("not stalled")
+    
+    program = ["start", "move"]
+    initial_states = [
+        State(fluents={"fuel"}, released=set()),
+        State(fluents=set(), released=set()),
+        State(fluents={"fuel", "stalled"}, released=set()),
+    ]
+    finals = executor.execute_program_batch(program, initial_states)
+    
+    expected = []
+    for state in initial_states:
+        states = executor.execute_program(program, state)
+        expected.append(states[-1] if states else None)
+    assert finals == expected
+    assert "position_changed" in finals[0].fluents
+    assert finals[2].fluents == {"fuel", "engine_on", "position_changed"}
+
+def test_final_state_mask():
+    executor = ActionExecutor()
+    executor.add_causes_rule("start", "engine_on")
+    executor.add_causes_rule("move", "position_changed", ["engine_on"])
+    executor.add_impossible_rule("move", ["stalled"])
+    
+    state = State(fluents=set(), released=set())
+    fluents, released = executor.final_state_mask(["start", "move"], state)
+    assert executor.fluent_index.fluents(fluents) == executor.execute_program(["start", "move"], state)[-1].fluents
+    assert released == 0
+    assert executor.final_state_mask(["move"], State(fluents={"stalled"}, released=set())) is None
+    assert executor.check_accessible({"engine_on", "position_changed"}, ["start", "move"], state)
+    assert not executor.check_accessible({"engine_on", "unknown"}, ["start", "move"], state)
+    assert executor.execute_program_batch(["move"], [State(fluents={"stalled"}, released=set())]) == [None]
+
+def test_execute_action_delta():
+    executor = ActionExecutor()
+    executor.add_causes_rule("stop", "not engine_on")
+    executor.add_causes_rule("stop", "parked", ["engine_on"])
+    executor.add_always_rule("not parked")
+    
+    state = State(fluents={"engine_on", "cargo"}, released=set())
+    delta = executor.action_delta("stop", state)
+    assert delta.added == set()
+    assert delta.removed == {"engine_on", "parked"}
+    
+    # Negative effects persist; untouched fluents are inertial
+    new_state = executor.execute_action("stop", state)
+    assert new_state.fluents == {"cargo"}
+    assert state.fluents == {"engine_on", "cargo"}
+
+def test_is_action_possible_indexed():
+    executor = ActionExecutor()
+    executor.add_impossible_rule("fire", ["reloading", "jammed"])
+    executor.add_impossible_rule("fire", ["no_ammo"])
+    executor.add_impossible_rule("halt", [])
+    
+    assert executor.is_action_possible("fire", State(fluents={"reloading"}, released=set()))
+    assert not executor.is_action_possible("fire", State(fluents={"reloading", "jammed"}, released=set()))
+    assert not executor.is_action_possible("fire", State(fluents={"no_ammo"}, released=set()))
+    assert not executor.is_action_possible("halt", State(fluents=set(), released=set()))
+    assert executor.is_action_possible("move", State(fluents={"no_ammo"}, released=set()))
+
+def test_action_table_rebuilt_after_new_rule():
+    executor = ActionExecutor()
+    executor.add_causes_rule("move", "position_changed", ["engine_on"])
+    executor.add_releases_rule("move", "fuel")
+    
+    bundle = executor.action_table()["move"]
+    assert not hasattr(bundle, "__dict__")
+    assert bundle.releases == {"fuel"}
+    assert executor.action_table() is executor.action_table()
+    
+    executor.add_impossible_rule("move", ["stalled"])
+    assert executor.action_table()["move"].impossible == (frozenset({"stalled"}),)
+    assert not executor.is_action_possible("move", State(fluents={"stalled"}, released=set()))
+
+def test_rule_fluents_interned():
+    executor = ActionExecutor()
+    executor.add_causes_rule("stop", " ".join(["not", "engine_on"]))
+    executor.add_causes_rule("start", "".join(["engine", "_on"]))
+    assert executor.causes_rules["stop"][0][0] is executor.causes_rules["start"][0][0]
+
+def test_negated_conditions():
+    executor = ActionExecutor()
+    executor.add_causes_rule("fire", "target_destroyed", ["target_locked", "not jammed"])
+    executor.add_impossible_rule("fire", ["not ammunition_loaded"])
+    executor.add_impossible_rule("wait", ["ready", "not ready"])
+    
+    loaded = State(fluents={"ammunition_loaded", "target_locked"}, released=set())
+    assert "target_destroyed" in executor.execute_action("fire", loaded).fluents
+    jammed = State(fluents={"ammunition_loaded", "target_locked", "jammed"}, released=set())
+    assert "target_destroyed" not in executor.execute_action("fire", jammed).fluents
+    assert executor.execute_action("fire", State(fluents={"target_locked"}, released=set())) is None
+    # Contradictory conditions never hold
+    assert executor.is_action_possible("wait", State(fluents={"ready"}, released=set()))
+    assert executor.execute_program_batch(["fire"], [loaded, jammed]) == [
+        executor.execute_action("fire", loaded), executor.execute_action("fire", jammed)
+    ]
+
+def test_state_copy_is_shallow(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("State.copy must not deep-copy")
+    monkeypatch.setattr(copy, "deepcopy", fail)
+    
+    state = State(fluents={"engine_on", "target_locked"}, released={"engine_on"})
+    clone = state.copy()
+    assert clone == state
+    assert clone.fluents is not state.fluents
+    assert sys.getsizeof(clone.fluents) == sys.getsizeof(state.fluents)
+
 def test_semantics():
     semantics = ActionSemantics()
     
@@ -74,6 +265,148 @@ def test_semantics():
     assert len(states) == 2  # Initial + final state
     assert "position_changed" in states[-1]["fluents"]
 
+def test_domain_definition_cache():
+    ActionSemantics._domain_cache.clear()
+    domain = """
+    initially engine_on
+    causes move(driver) position_changed if engine_on
+    impossible move(driver) if not engine_on
+    """
+    first = ActionSemantics()
+    first.process_domain_definition(domain)
+    second = ActionSemantics()
+    misses = second.parser.statement_cache_info().misses
+    second.process_domain_definition(domain)
+    
+    assert len(ActionSemantics._domain_cache) == 1
+    assert second.parser is first.parser
+    assert second.parser.statement_cache_info().misses == misses
+    assert second.initial_state == first.initial_state
+    assert second.executor.causes_rules == first.executor.causes_rules
+    assert second.executor.impossible_rules == first.executor.impossible_rules
+
+def test_domain_definition_bytes():
+    ActionSemantics._domain_cache.clear()
+    domain = "initially not armed\ncauses arm(gunner) armed"
+    first = ActionSemantics()
+    first.process_domain_definition(domain)
+    second = ActionSemantics()
+    second.process_domain_definition_bytes(domain.encode('utf-8'))
+    
+    assert len(ActionSemantics._domain_cache) == 1
+    assert second.executor.causes_rules == first.executor.causes_rules
+    with pytest.raises(ValueError):
+        second.process_domain_definition_bytes(b"causes")
+
+def test_domain_definition_replaces_previous_rules():
+    domain_a = "causes start engine_on\ncauses stop not engine_on"
+    domain_b = "causes move at_b"
+    semantics = ActionSemantics()
+    semantics.process_domain_definition(domain_a)
+    semantics.process_domain_definition(domain_b)
+    semantics.process_domain_definition(domain_a)
+    
+    rules = semantics.executor.causes_rules
+    assert {action: len(effects) for action, effects in rules.items()} == {"start": 1, "stop": 1}
+    assert semantics.process_query("accessible at_b in move") == (False, "Goal is not accessible")
+
+def test_domain_definition_precompiles_executor():
+    semantics = ActionSemantics()
+    semantics.process_domain_definition("causes move(driver) position_changed if engine_on")
+    
+    compiled = semantics.executor._compiled
+    assert compiled is not None
+    assert semantics.executor.compile() is compiled
+
+def test_name_helpers():
+    class Effect:
+        def __init__(self, name):
+            self.name = name
+            self.negated = True
+    
+    semantics = ActionSemantics()
+    effect = Effect("engine_on")
+    assert semantics._get_effect_name(effect) == "not engine_on"
+    effect.name = "renamed"
+    assert semantics._get_effect_name(effect) == "not renamed"
+    assert semantics._get_effect_name(("not", "x")) == "('not', 'x')"
+    assert semantics._get_action_name("move(driver)") == "move(driver)"
+    assert action_name(("fire", "(", "gunner", "driver", ")")) == "fire(gunner,driver)"
+    assert action_name(("wait",)) == "wait"
+
+def test_parse_program_expressions():
+    class Action:
+        def __init__(self, name):
+            self.name = name
+    
+    semantics = ActionSemantics()
+    assert semantics._parse_program("move(driver)") == ["move(driver)"]
+    assert semantics._parse_program(["scan(commander)", Action("aim(gunner)")]) == ["scan(commander)", "aim(gunner)"]
+    assert semantics._parse_program(Action("fire(gunner)")) == ["fire(gunner)"]
+    assert semantics._parse_program(iter([Action("load(gunner)")])) == ["load(gunner)"]
+
+def test_query_dispatch():
+    semantics = ActionSemantics()
+    semantics.process_domain_definition("""
+    causes start_engine(driver) engine_on
+    causes move(driver) position_changed if engine_on
+    impossible move(driver) if stalled
+    """)
+    state = State(fluents={"stalled"}, released=set())
+    
+    assert semantics.process_query("always executable start_engine(driver)", state)[0] is True
+    assert semantics.process_query("executable start_engine(driver); move(driver)", state)[0] is False
+    result, explanation = semantics.process_query(
+        "sometimes accessible position_changed from engine_on, not stalled in move(driver)", state
+    )
+    assert result is True
+    assert "accessible" in explanation
+    assert semantics.process_query("realisable move(driver) by driver", state)[0] is False
+    assert semantics.process_query("active gunner in fire by commander, driver")[0] is False
+    with pytest.raises(ValueError):
+        semantics.process_query("eventually move(driver)")
+
+def test_compile_query():
+    assert compile_query("always executable start_engine(driver); move( driver )") == (
+        "executable", (("start_engine(driver)", "move(driver)"),)
+    )
+    kind, (goal, conditions, program) = compile_query("accessible a, b from c, not d in x; y")
+    assert kind == "accessible"
+    assert goal == {"a", "b"}
+    assert conditions == (("c", True), ("d", False))
+    assert program == ("x", "y")
+    assert compile_query("active gunner in fire by commander, gunner") == (
+        "active", ("gunner", "fire", ("commander", "gunner"))
+    )
+    assert compile_query("accessible a in x") is compile_query("accessible a in x")
+    with pytest.raises(ValueError):
+        compile_query("realisable move(driver)")
+
+def test_iter_simulation():
+    semantics = ActionSemantics()
+    semantics.process_domain_definition("""
+    causes start_engine(driver) engine_on
+    causes move(driver) position_changed if engine_on
+    impossible move(driver) if stalled
+    """)
+    initial_state = State(fluents=set(), released=set())
+    
+    steps = semantics.iter_simulation("start_engine(driver); move(driver)", initial_state)
+    assert next(steps)["fluents"] == set()
+    assert [step["fluents"] for step in steps] == [{"engine_on"}, {"engine_on", "position_changed"}]
+    assert len(semantics.simulate_program("start_engine(driver); move(driver)", initial_state)) == 3
+    assert semantics.simulate_program("move(driver)", State(fluents={"stalled"}, released=set())) == []
+
+def test_releases_statement():
+    semantics = ActionSemantics()
+    semantics.process_domain_definition("""
+    causes spin(gunner) turret_moved
+    releases spin(gunner) heading
+    """)
+    assert semantics.executor.releases_rules == {"spin(gunner)": ["heading"]}
+    states = semantics.simulate_program("spin(gunner)", State(fluents={"heading"}, released=set()))
+    assert states[-1]["released"] == {"heading"}
+
 def test_tank_crew_scenario():
     semantics = ActionSemantics()
     
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import pytest
+from db.database import DatabaseManager, read_schema
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Schema is loaded relative to the project root
+    monkeypatch.chdir(PROJECT_DIR)
+    manager = DatabaseManager(str(tmp_path / "problems.db"))
+    yield manager
+    manager.close()
+
+def test_example_problems_loaded(db):
+    names = [problem["name"] for problem in db.get_all_problems()]
+    assert "Tank Crew Mission" in names
+    assert names == sorted(names)
+
+def test_iter_problems(db):
+    problems = db.iter_problems()
+    assert next(problems)["name"] == "Fire Brigade"
+    assert [p["name"] for p in db.iter_problems()] == [p["name"] for p in db.get_all_problems()]
+
+def test_connection_reused_across_calls(db):
+    conn = db._conn
+    problem_id = db.add_problem("Test Problem", "desc", "causes a(x) f", "always executable a(x)")
+    assert db.get_problem(problem_id)["name"] == "Test Problem"
+    assert db.update_problem(problem_id, "Renamed", "desc", "causes a(x) f", "")
+    assert db.get_problem_by_name("Renamed")["id"] == problem_id
+    assert db.delete_problem(problem_id)
+    assert db.get_problem(problem_id) is None
+    assert db._conn is conn
+
+def test_get_problems_by_names(db):
+    problems = db.get_problems_by_names(["Tank Crew Mission", "Football Team", "Missing"])
+    assert sorted(problems) == ["Football Team", "Tank Crew Mission"]
+    assert problems["Football Team"]["id"] == db.get_problem_by_name("Football Team")["id"]
+    assert db.get_problems_by_names([]) == {}
+
+def test_add_problems(db):
+    assert db.add_problems([("Batch A", "a", "", ""), ("Batch B", "b", "", "")]) is None
+    ids = db.add_problems([("Batch C", "c", "", "")], returning=True)
+    assert db.get_problem(ids[0])["name"] == "Batch C"
+    assert sorted(p["name"] for p in db.search_problems("Batch")) == ["Batch A", "Batch B", "Batch C"]
+    
+    # A failing row rolls back the whole batch
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_problems([("Batch D", "d", "", ""), ("Batch A", "dup", "", "")])
+    assert db.get_problem_by_name("Batch D") is None
+
+def test_search_problems(db):
+    assert [p["name"] for p in db.search_problems("Crew")] == ["Tank Crew Mission"]
+    assert [p["name"] for p in db.search_problems("combat mission")] == ["Tank Crew Mission"]
+    # Terms shorter than a trigram fall back to LIKE
+    assert "Football Team" in [p["name"] for p in db.search_problems("am")]
+    
+    problem_id = db.add_problem("Chess Club", "Players \"quoted\" opening", "", "")
+    assert [p["id"] for p in db.search_problems('"quoted"')] == [problem_id]
+    db.update_problem(problem_id, "Go Club", "Players", "", "")
+    assert db.search_problems("Chess") == []
+    db.delete_problem(problem_id)
+    assert db.search_problems("Club") == []
+
+def test_search_problems_prefix(db):
+    assert [p["name"] for p in db.search_problems_prefix("tank")] == ["Tank Crew Mission"]
+    db.add_problem("Tank_2", "", "", "")
+    # Wildcards in the prefix are matched literally
+    assert [p["name"] for p in db.search_problems_prefix("Tank_")] == ["Tank_2"]
+    assert db.search_problems_prefix("%") == []
+    
+    plan = db._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM problems WHERE name LIKE ? ESCAPE '\\'", ("Tank%",)
+    ).fetchall()
+    assert "idx_problems_name_nocase" in plan[0]["detail"]
+
+def test_search_index_added_to_existing_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(PROJECT_DIR)
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE problems (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                description TEXT NOT NULL,
+                domain_definition TEXT NOT NULL,
+                example_queries TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("INSERT INTO problems (name, description, domain_definition, example_queries) VALUES ('Legacy', 'Old row', '', '')")
+    manager = DatabaseManager(db_path)
+    assert [p["name"] for p in manager.search_problems("Legacy")] == ["Legacy"]
+    assert [p["name"] for p in manager.search_problems_prefix("leg")] == ["Legacy"]
+    manager.close()
+
+def test_upgrade_keeps_deleted_seed_problems_deleted(tmp_path, monkeypatch):
+    monkeypatch.chdir(PROJECT_DIR)
+    db_path = str(tmp_path / "seeded.db")
+    with sqlite3.connect(db_path) as conn:
+        # Seeded before the search index existed, then edited by the user
+        conn.executescript(read_schema())
+        conn.execute("DELETE FROM problems WHERE name = 'Football Team'")
+        count = conn.execute("SELECT COUNT(*) FROM problems").fetchone()[0]
+    manager = DatabaseManager(db_path)
+    assert manager.get_problem_by_name("Football Team") is None
+    assert len(manager.get_all_problems()) == count
+    assert [p["name"] for p in manager.search_problems("Rescue")] == ["Rescue Team"]
+    manager.close()
+
+def test_connection_pragmas(db):
+    assert db._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db._conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+if __name__ == "__main__":
+    pytest.main([__file__])